@@ -0,0 +1,26 @@
+"""Add project version
+
+Revision ID: 5e3a7c9d1b48
+Revises: 9b1e4d7a2c36
+Create Date: 2026-10-17 23:09:41.275031
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e3a7c9d1b48'
+down_revision: Union[str, None] = '9b1e4d7a2c36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('projects', 'version')
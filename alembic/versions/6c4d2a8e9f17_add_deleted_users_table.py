@@ -0,0 +1,33 @@
+"""Add deleted_users table
+
+Revision ID: 6c4d2a8e9f17
+Revises: 5e3a7c9d1b48
+Create Date: 2026-10-18 09:12:05.418233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c4d2a8e9f17'
+down_revision: Union[str, None] = '5e3a7c9d1b48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'deleted_users',
+        sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+    op.create_index(op.f('ix_deleted_users_deleted_at'), 'deleted_users', ['deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_deleted_users_deleted_at'), table_name='deleted_users')
+    op.drop_table('deleted_users')
@@ -0,0 +1,29 @@
+"""Add project_tasks dependency index
+
+Revision ID: 7d2f9b4c1e85
+Revises: 3a8c5e1f7b64
+Create Date: 2026-10-17 23:41:52.106284
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2f9b4c1e85'
+down_revision: Union[str, None] = '3a8c5e1f7b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY does not lock writes but cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index('ix_project_tasks_project_id_dependency', 'project_tasks', ['project_id', 'dependency'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_project_tasks_project_id_dependency', table_name='project_tasks', postgresql_concurrently=True)
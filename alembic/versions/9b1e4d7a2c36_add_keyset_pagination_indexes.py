@@ -0,0 +1,33 @@
+"""Add keyset pagination indexes
+
+Revision ID: 9b1e4d7a2c36
+Revises: 7d2f9b4c1e85
+Create Date: 2026-10-17 22:57:13.482910
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1e4d7a2c36'
+down_revision: Union[str, None] = '7d2f9b4c1e85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY does not lock writes but cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index('ix_projects_company_id_id', 'projects', ['company_id', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_users_company_id_id', 'users', ['company_id', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_cities_province_id_name_id', 'cities', ['province_id', 'name', 'id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_cities_province_id_name_id', table_name='cities', postgresql_concurrently=True)
+        op.drop_index('ix_users_company_id_id', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_projects_company_id_id', table_name='projects', postgresql_concurrently=True)
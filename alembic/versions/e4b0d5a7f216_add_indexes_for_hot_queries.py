@@ -0,0 +1,46 @@
+"""Add indexes for hot query shapes
+
+Revision ID: e4b0d5a7f216
+Revises: c27d84f0a913
+Create Date: 2026-10-17 13:41:05.662390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b0d5a7f216'
+down_revision: Union[str, None] = 'c27d84f0a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns)
+INDEXES = [
+    # contractor dashboard
+    ('ix_project_tasks_assignee_id', 'project_tasks', ['assignee_id']),
+    # task catalog
+    ('ix_tasks_company_id_parent_id', 'tasks', ['company_id', 'parent_id']),
+    # duration analytics
+    ('ix_projects_company_id_status_created_at', 'projects', ['company_id', 'status', 'created_at']),
+    ('ix_notifications_to_user_id', 'notifications', ['to_user_id']),
+    # delete_project
+    ('ix_notifications_project_id', 'notifications', ['project_id']),
+    # verify_code
+    ('ix_users_verification_code', 'users', ['verification_code']),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY does not lock writes but cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
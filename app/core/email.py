@@ -1,36 +1,135 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+import asyncio
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import Optional
+import aiosmtplib
 from pydantic import EmailStr
-from jinja2 import Environment, select_autoescape, PackageLoader
+from jinja2 import Environment, Template, select_autoescape, PackageLoader
 from app.core.settings import settings
-from datetime import datetime
-from starlette.responses import JSONResponse
-
-email_conf = ConnectionConfig(
-    MAIL_USERNAME=settings.MAIL_USERNAME,
-    MAIL_PASSWORD=settings.MAIL_PASSWORD,
-    MAIL_FROM=settings.MAIL_FROM,
-    MAIL_PORT=settings.MAIL_PORT,  # 587 for TLS
-    MAIL_SERVER=settings.MAIL_SERVER,  # smtp.gmail.com
-    MAIL_FROM_NAME=settings.MAIL_FROM_NAME,
-    MAIL_STARTTLS=True,  # Enable STARTTLS for TLS encryption
-    MAIL_SSL_TLS=False,  # Don't use SSL; use STARTTLS instead
-)
-
+from app.models.email_outbox import EmailOutbox
 
 env = Environment(
     loader=PackageLoader("app", "templates/email"),
     autoescape=select_autoescape(["html", "xml"]),
 )
 
+# compiled templates by name ("notification", "verification_code", ...), filled by load_templates()
+templates: dict[str, Template] = {}
 
-# Send email
-async def send_email(email_to: EmailStr, subject: str, template_name: str, data: dict):
-    template = env.get_template(f"{template_name}.html")
-    html = template.render(**data)
 
-    message = MessageSchema(
-        subject=subject, recipients=[email_to], body=html, subtype="html"
+def load_templates():
+    for template_file in env.list_templates(extensions=["html"]):
+        templates[template_file.removesuffix(".html")] = env.get_template(template_file)
+
+
+def render_template(template_name: str, data: dict) -> str:
+    template = templates.get(template_name)
+    if template is None:
+        # not loaded at startup (e.g. outside the app), compile it once now
+        template = templates[template_name] = env.get_template(f"{template_name}.html")
+    return template.render(**data)
+
+
+# long-lived SMTP connections shared by every send_email call
+# each connection sends many messages and is reopened when the server drops it
+class SMTPPool:
+    def __init__(self, size: int, max_messages_per_connection: int):
+        self.size = size
+        self.max_messages_per_connection = max_messages_per_connection
+        self._idle: Optional[asyncio.Queue] = None
+        self._sent: dict[int, int] = {}
+
+    def _new_client(self) -> aiosmtplib.SMTP:
+        return aiosmtplib.SMTP(
+            hostname=settings.MAIL_SERVER,
+            port=settings.MAIL_PORT,
+            username=settings.MAIL_USERNAME or None,
+            password=settings.MAIL_PASSWORD or None,
+            # upgrade a plain connection with STARTTLS (usually port 587), or
+            # connect over TLS from the start (usually port 465), not both
+            start_tls=settings.MAIL_STARTTLS,
+            use_tls=settings.MAIL_SSL_TLS,
+            timeout=settings.MAIL_TIMEOUT_SECONDS,
+        )
+
+    def _get_idle(self) -> asyncio.Queue:
+        # created lazily so it binds to the running event loop
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for _ in range(self.size):
+                self._idle.put_nowait(self._new_client())
+        return self._idle
+
+    async def _ensure_connected(self, client: aiosmtplib.SMTP) -> aiosmtplib.SMTP:
+        if self._sent.get(id(client), 0) >= self.max_messages_per_connection:
+            await self._quit(client)
+        if not client.is_connected:
+            await client.connect()
+            self._sent[id(client)] = 0
+        return client
+
+    async def _quit(self, client: aiosmtplib.SMTP):
+        self._sent.pop(id(client), None)
+        try:
+            if client.is_connected:
+                await client.quit()
+        except aiosmtplib.SMTPException:
+            client.close()
+
+    async def send(self, message: EmailMessage):
+        idle = self._get_idle()
+        client = await idle.get()
+        try:
+            try:
+                await self._ensure_connected(client)
+                await client.send_message(message)
+            except (aiosmtplib.SMTPServerDisconnected, ConnectionError):
+                # the server closed an idle session, reconnect once and retry
+                client.close()
+                await self._ensure_connected(client)
+                await client.send_message(message)
+            self._sent[id(client)] += 1
+        except Exception:
+            client.close()
+            self._sent.pop(id(client), None)
+            raise
+        finally:
+            idle.put_nowait(client)
+
+    async def close(self):
+        if self._idle is None:
+            return
+        while not self._idle.empty():
+            await self._quit(self._idle.get_nowait())
+        self._idle = None
+
+
+smtp_pool = SMTPPool(
+    size=settings.MAIL_POOL_SIZE,
+    max_messages_per_connection=settings.MAIL_MAX_MESSAGES_PER_CONNECTION,
+)
+
+
+# request handlers queue email instead of sending it, the outbox worker delivers it
+# only adds the row, the caller commits it together with the rest of its changes
+def queue_email(db, email_to: EmailStr, subject: str, template_name: str, data: dict):
+    db.add(
+        EmailOutbox(
+            email_to=email_to,
+            subject=subject,
+            template_name=template_name,
+            data=data,
+        )
     )
-    fastmail = FastMail(email_conf)
-    await fastmail.send_message(message)
+
+
+async def send_email(email_to: EmailStr, subject: str, template_name: str, data: dict):
+    html = render_template(template_name, data)
+
+    message = EmailMessage()
+    message["From"] = formataddr((settings.MAIL_FROM_NAME, settings.MAIL_FROM))
+    message["To"] = email_to
+    message["Subject"] = subject
+    message.set_content(html, subtype="html")
+    await smtp_pool.send(message)
     # return JSONResponse(status_code=200, content={"message": "email has been sent"})
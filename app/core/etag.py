@@ -0,0 +1,46 @@
+import hashlib
+from typing import Optional
+from fastapi import Response
+from starlette import status
+
+
+# weak ETag (W/"...") for a response built from these values, e.g. updated_at stamps
+# weak because equal tags promise the same content, not the same bytes
+def weak_etag(*values) -> str:
+    digest = hashlib.blake2b(repr(values).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+# If-None-Match holds one or more tags, or *, compared weakly (W/ ignored)
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == tag
+        for candidate in if_none_match.split(",")
+    )
+
+
+# by default clients keep the body and revalidate it with If-None-Match on every request
+def set_etag(
+    response: Response, etag: str, cache_control: str = "private, no-cache"
+) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+def not_modified(etag: str, cache_control: str = "private, no-cache") -> Response:
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_etag(response, etag, cache_control)
+    return response
+
+
+# a matching If-None-Match on a request that only reads through POST, which caches do not
+# store, so the client is told its copy is current with 412 instead of 304
+def precondition_failed(etag: str) -> Response:
+    response = Response(status_code=status.HTTP_412_PRECONDITION_FAILED)
+    response.headers["ETag"] = etag
+    return response
@@ -0,0 +1,42 @@
+from typing import AsyncIterator, List, Type
+from pydantic import BaseModel
+from sqlalchemy import Select
+from app.core.readonly import row_dicts
+from app.core.serialization import type_adapter
+from app.core.settings import settings
+from app.database import AsyncSessionLocal
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+# stream query rows as NDJSON lines or one JSON array, a batch of rows per chunk
+# rows come from a server-side cursor (yield_per), so memory holds one batch whatever
+# the number of rows
+# the export opens its own session: request dependencies are closed before a
+# streaming body is sent
+async def stream_export(
+    query: Select, schema: Type[BaseModel], export_format: str = "ndjson"
+) -> AsyncIterator[bytes]:
+    adapter = type_adapter(List[schema])
+    item_adapter = type_adapter(schema)
+    first = True
+    if export_format == "json":
+        yield b"["
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            query.execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            items = adapter.validate_python(row_dicts(rows), from_attributes=True)
+            if export_format == "ndjson":
+                yield b"".join(item_adapter.dump_json(item) + b"\n" for item in items)
+            else:
+                # the batch as a JSON array without its brackets
+                chunk = adapter.dump_json(items)[1:-1]
+                yield chunk if first else b"," + chunk
+            first = False
+    if export_format == "json":
+        yield b"]"
@@ -0,0 +1,114 @@
+from bisect import bisect_left, bisect_right
+from types import MappingProxyType
+from typing import List, Optional
+from fastapi import HTTPException
+from starlette import status
+from app.core.etag import weak_etag
+from app.core.readonly import row_dicts, select_schema
+from app.core.serialization import type_adapter
+from app.database import AsyncSessionLocal
+from app.models.city import City
+from app.models.province import Province
+from app.schemas.city import CityBase
+from app.schemas.province import ProvinceBase
+
+
+def _city_key(city: CityBase) -> tuple:
+    return (city.name.casefold(), city.id)
+
+
+# provinces and cities, seeded once by init_db and never edited through the API, so they
+# are read once and served from memory: tuples and read-only mappings, nothing to lock
+class GeoData:
+    def __init__(self, provinces: List[ProvinceBase], cities: List[CityBase]):
+        self.provinces = tuple(sorted(provinces, key=lambda province: province.id))
+        self.provinces_by_id = MappingProxyType(
+            {province.id: province for province in self.provinces}
+        )
+        self.cities_by_id = MappingProxyType({city.id: city for city in cities})
+
+        # each province's cities by case-insensitive name, with their sort keys for bisect
+        by_province = {province.id: [] for province in self.provinces}
+        for city in sorted(cities, key=_city_key):
+            by_province.setdefault(city.province_id, []).append(city)
+        self.cities_by_province = MappingProxyType(
+            {province_id: tuple(rows) for province_id, rows in by_province.items()}
+        )
+        self._city_keys = MappingProxyType(
+            {
+                province_id: tuple(_city_key(city) for city in rows)
+                for province_id, rows in self.cities_by_province.items()
+            }
+        )
+        # every city by name, for prefix lookups across provinces
+        self.cities_by_name = tuple(sorted(cities, key=_city_key))
+        self._name_keys = tuple(_city_key(city) for city in self.cities_by_name)
+
+        # the responses only change with the data, build them once
+        self.provinces_json = type_adapter(List[ProvinceBase]).dump_json(
+            list(self.provinces)
+        )
+        self.etag = weak_etag(
+            "geo",
+            self.provinces_json,
+            type_adapter(List[CityBase]).dump_json(list(self.cities_by_name)),
+        )
+
+    # cities whose name starts with prefix (case-insensitive), in the province if given
+    # after is the sort key of the last city already sent (keyset paging)
+    def cities(
+        self,
+        province_id: Optional[int] = None,
+        prefix: str = "",
+        after: Optional[tuple] = None,
+    ) -> tuple:
+        if province_id is None:
+            rows, keys = self.cities_by_name, self._name_keys
+        else:
+            rows = self.cities_by_province.get(province_id, ())
+            keys = self._city_keys.get(province_id, ())
+        prefix = prefix.casefold()
+        start = bisect_left(keys, (prefix,))
+        if after is not None:
+            start = max(start, bisect_right(keys, after))
+        # names from "prefix" up to, but not including, the first name past all of them
+        end = bisect_left(keys, (prefix + "\U0010ffff",)) if prefix else len(keys)
+        return rows[start:end]
+
+    # the same checks a foreign key would make, without a database round trip
+    def check_location(self, city_id: int, province_id: int) -> None:
+        city = self.cities_by_id.get(city_id)
+        if city is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="City does not exist."
+            )
+        if province_id not in self.provinces_by_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Province does not exist.",
+            )
+        if city.province_id != province_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="City is not in this province.",
+            )
+
+
+geo_data: Optional[GeoData] = None
+
+
+async def load_geo_data() -> GeoData:
+    global geo_data
+    async with AsyncSessionLocal() as db:
+        provinces = row_dicts(await db.execute(select_schema(Province, ProvinceBase)))
+        cities = row_dicts(await db.execute(select_schema(City, CityBase)))
+    geo_data = GeoData(
+        type_adapter(List[ProvinceBase]).validate_python(provinces),
+        type_adapter(List[CityBase]).validate_python(cities),
+    )
+    return geo_data
+
+
+# loaded at startup, or by the first request when startup did not run (scripts, tests)
+async def get_geo_data() -> GeoData:
+    return geo_data or await load_geo_data()
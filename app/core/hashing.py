@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from starlette import status
+from app.core.settings import settings
+
+# password hashing and unhashing
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# bcrypt takes 100-300 ms of CPU per call, so it runs on a bounded pool instead of the event loop
+_executor: Optional[Executor] = None
+# hashes submitted to the pool that have not finished yet (running + queued)
+# released by the pool's done callbacks, off the event loop thread, hence the lock
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+hash_metrics = {
+    "calls": 0,
+    "rejected": 0,
+    "total_seconds": 0.0,
+    "max_seconds": 0.0,
+}
+
+
+# module level functions so they can be pickled for a process pool
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(password, hashed_password)
+
+
+def get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hash",
+            )
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _release(future=None):
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight -= 1
+
+
+async def _run(func, *args):
+    global _in_flight
+    # reject fast instead of letting logins pile up behind a saturated pool
+    with _in_flight_lock:
+        admitted = (
+            _in_flight
+            < settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE
+        )
+        if admitted:
+            _in_flight += 1
+    if not admitted:
+        hash_metrics["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again",
+            headers={"Retry-After": "1"},
+        )
+
+    started = time.perf_counter()
+    try:
+        future = get_executor().submit(func, *args)
+    except BaseException:
+        _release()
+        raise
+    # the slot is freed when the pool is done with the job, not when this request stops
+    # waiting: a disconnected client's hash keeps running and still counts
+    future.add_done_callback(_release)
+    try:
+        return await asyncio.wrap_future(future)
+    finally:
+        elapsed = time.perf_counter() - started
+        hash_metrics["calls"] += 1
+        hash_metrics["total_seconds"] += elapsed
+        hash_metrics["max_seconds"] = max(hash_metrics["max_seconds"], elapsed)
+
+
+async def hash_password(password: str) -> str:
+    return await _run(_hash, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    return await _run(_verify, password, hashed_password)
+
+
+def get_hash_metrics() -> dict:
+    calls = hash_metrics["calls"]
+    return {
+        **hash_metrics,
+        "avg_seconds": hash_metrics["total_seconds"] / calls if calls else 0.0,
+        "executor": settings.PASSWORD_HASH_EXECUTOR,
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "queue_size": settings.PASSWORD_HASH_QUEUE_SIZE,
+        "in_flight": _in_flight,
+        "utilization": min(_in_flight, settings.PASSWORD_HASH_WORKERS)
+        / settings.PASSWORD_HASH_WORKERS,
+    }
@@ -0,0 +1,69 @@
+import base64
+import json
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from app.core.readonly import row_dicts
+
+
+# keyset cursors are the sort key of the last row sent, base64 encoded so clients treat them as opaque
+def encode_cursor(values: dict) -> str:
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    if not isinstance(values, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    return values
+
+
+# one page of query ordered by keys: not-null columns, unique together, ascending
+# query should select the keys as columns (readonly.select_schema), rows are dicts
+# returns (rows, next_cursor, total), total is only counted when asked because it
+# has to visit every matching row, the page itself reads at most limit + 1 rows
+async def keyset_page(
+    db: AsyncSession,
+    query: Select,
+    keys: list,
+    limit: int,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+) -> tuple:
+    total = None
+    if include_total:
+        total = await db.scalar(
+            select(func.count()).select_from(query.order_by(None).subquery())
+        )
+    if cursor:
+        values = decode_cursor(cursor)
+        after = [values.get(key.key) for key in keys]
+        if not all(
+            isinstance(value, key.type.python_type) for key, value in zip(keys, after)
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+        if len(keys) == 1:
+            query = query.filter(keys[0] > after[0])
+        else:
+            # row value comparison, (a, b) > (x, y), walks the matching index in order
+            query = query.filter(tuple_(*keys) > tuple_(*after))
+    # one extra row tells us whether there is a next page
+    rows = row_dicts(await db.execute(query.order_by(*keys).limit(limit + 1)))
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor({key.key: rows[-1][key.key] for key in keys})
+    return rows, next_cursor, total
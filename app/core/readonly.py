@@ -0,0 +1,26 @@
+from typing import Type
+from pydantic import BaseModel
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Bundle
+
+
+# read-only list queries select exactly the columns their response schema reads and
+# return plain rows: no ORM instances, identity map, change tracking or lazy loaders
+# validate them as plain dicts (row_dicts), pydantic reads a dict about twice as fast
+# as a RowMapping, and a RowMapping about twice as fast as the attributes of a Row
+def schema_columns(model, schema: Type[BaseModel]) -> list:
+    table = model.__table__
+    return [table.c[name] for name in schema.model_fields if name in table.c]
+
+
+def select_schema(model, schema: Type[BaseModel]) -> Select:
+    return select(*schema_columns(model, schema))
+
+
+def row_dicts(rows) -> list:
+    return [dict(row._mapping) for row in rows]
+
+
+# the schema's columns as one nested row, e.g. dict(row.task._mapping)
+def schema_bundle(name: str, model, schema: Type[BaseModel]) -> Bundle:
+    return Bundle(name, *schema_columns(model, schema))
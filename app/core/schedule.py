@@ -0,0 +1,318 @@
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import TTLCache
+from app.core.settings import settings
+from app.models.project import Project
+from app.models.project_task import ProjectTask
+
+
+# the tasks' dependencies form a loop, so no schedule exists
+class ScheduleCycleError(Exception):
+    def __init__(self, task_ids: list):
+        self.task_ids = task_ids
+        super().__init__(f"Task dependencies form a cycle: {task_ids}")
+
+
+# a project's tasks as a DAG of array indexes, task i can start when predecessor[i] finishes
+# durations are in days, built once and reused for every schedule computed on it
+class TaskGraph:
+    def __init__(self, tasks):
+        # tasks: (task_id, dependency task id or None, duration) tuples
+        self.task_ids = [task_id for task_id, _, _ in tasks]
+        self.index = {task_id: i for i, task_id in enumerate(self.task_ids)}
+        self.durations = [duration or 0 for _, _, duration in tasks]
+        # -1 when the task has no dependency, or depends on a task outside the project
+        self.predecessor = [
+            self.index.get(dependency, -1) for _, dependency, _ in tasks
+        ]
+        self.successors = [[] for _ in tasks]
+        for i, predecessor in enumerate(self.predecessor):
+            if predecessor >= 0:
+                self.successors[predecessor].append(i)
+        self.order = self._topological_order()
+
+    # Kahn's algorithm, O(V + E)
+    def _topological_order(self) -> list:
+        order = [i for i, predecessor in enumerate(self.predecessor) if predecessor < 0]
+        queue = deque(order)
+        while queue:
+            for successor in self.successors[queue.popleft()]:
+                order.append(successor)
+                queue.append(successor)
+        if len(order) < len(self.task_ids):
+            raise ScheduleCycleError(self._find_cycle(set(order)))
+        return order
+
+    # every task has at most one predecessor, so following them from a task that
+    # never got ordered ends up going round the cycle
+    def _find_cycle(self, ordered: set) -> list:
+        i = next(i for i in range(len(self.task_ids)) if i not in ordered)
+        seen = []
+        while i not in seen:
+            seen.append(i)
+            i = self.predecessor[i]
+        return [self.task_ids[j] for j in seen[seen.index(i) :]]
+
+    # earliest/latest start and finish (days from project start), float and critical path
+    # for what-if changes, durations overrides the task durations by index and
+    # delays holds extra days a task waits after its dependency finishes
+    def schedule(
+        self, durations: Optional[list] = None, delays: Optional[list] = None
+    ) -> "Schedule":
+        durations = durations or self.durations
+        size = len(self.task_ids)
+        delays = delays or [0] * size
+        earliest_start = [0] * size
+        earliest_finish = [0] * size
+        for i in self.order:
+            predecessor = self.predecessor[i]
+            if predecessor >= 0:
+                earliest_start[i] = earliest_finish[predecessor]
+            earliest_start[i] += delays[i]
+            earliest_finish[i] = earliest_start[i] + durations[i]
+        length = max(earliest_finish, default=0)
+
+        latest_start = [0] * size
+        latest_finish = [0] * size
+        for i in reversed(self.order):
+            latest_finish[i] = min(
+                (
+                    latest_start[successor] - delays[successor]
+                    for successor in self.successors[i]
+                ),
+                default=length,
+            )
+            latest_start[i] = latest_finish[i] - durations[i]
+
+        # walk back from the task that finishes last, every task on the way has zero float
+        critical_path = []
+        if size:
+            i = max(range(size), key=earliest_finish.__getitem__)
+            while i >= 0:
+                critical_path.append(self.task_ids[i])
+                i = self.predecessor[i]
+            critical_path.reverse()
+
+        return Schedule(
+            self,
+            durations,
+            length,
+            earliest_start,
+            earliest_finish,
+            latest_start,
+            latest_finish,
+            critical_path,
+        )
+
+
+# result of TaskGraph.schedule(), lists are indexed like graph.task_ids
+class Schedule:
+    def __init__(
+        self,
+        graph: TaskGraph,
+        durations: list,
+        length: int,
+        earliest_start: list,
+        earliest_finish: list,
+        latest_start: list,
+        latest_finish: list,
+        critical_path: list,
+    ):
+        self.graph = graph
+        self.durations = durations
+        self.length = length
+        self.earliest_start = earliest_start
+        self.earliest_finish = earliest_finish
+        self.latest_start = latest_start
+        self.latest_finish = latest_finish
+        self.critical_path = critical_path
+        # (project start date, JSON body) built from this schedule by the API, reused while cached
+        self.response = None
+
+    # days the task can slip without delaying the project
+    def total_float(self, i: int) -> int:
+        return self.latest_start[i] - self.earliest_start[i]
+
+
+# schedules by project id, with the task fingerprint they were computed from
+schedule_cache = TTLCache(
+    maxsize=settings.SCHEDULE_CACHE_SIZE, ttl=settings.SCHEDULE_CACHE_TTL_SECONDS
+)
+
+# task graphs by project id for what-if simulations, served without checking the
+# database for the short ttl so a burst of what-if calls loads the tasks once
+graph_cache = TTLCache(
+    maxsize=settings.WHAT_IF_GRAPH_CACHE_SIZE,
+    ttl=settings.WHAT_IF_GRAPH_CACHE_TTL_SECONDS,
+)
+
+
+# drop a project's cached schedule as soon as one of its tasks changes in this process
+# other processes notice the change through the fingerprint
+@event.listens_for(ProjectTask, "after_insert")
+@event.listens_for(ProjectTask, "after_update")
+@event.listens_for(ProjectTask, "after_delete")
+def invalidate_schedule(mapper, connection, target):
+    schedule_cache.invalidate(target.project_id)
+    graph_cache.invalidate(target.project_id)
+
+
+# cheap check for "has any task of the project changed since the schedule was cached"
+# every task insert, update and delete goes through the project rollup, which bumps
+# Project.version, bulk executemany updates included
+async def task_fingerprint(db: AsyncSession, project_id: int) -> Optional[int]:
+    return await db.scalar(select(Project.version).filter(Project.id == project_id))
+
+
+async def load_task_graph(db: AsyncSession, project_id: int) -> TaskGraph:
+    rows = await db.execute(
+        select(ProjectTask.task_id, ProjectTask.dependency, ProjectTask.duration)
+        .filter(ProjectTask.project_id == project_id)
+        .order_by(ProjectTask.task_id)
+    )
+    return TaskGraph(rows.all())
+
+
+# the project's task graph, from the short-lived what-if cache when possible
+async def get_task_graph(db: AsyncSession, project_id: int) -> TaskGraph:
+    graph = graph_cache.get(project_id)
+    if graph is None:
+        graph = await load_task_graph(db, project_id)
+        graph_cache.set(project_id, graph)
+    return graph
+
+
+# the project's schedule, recomputed only when its tasks changed
+async def get_schedule(db: AsyncSession, project_id: int) -> Schedule:
+    fingerprint = await task_fingerprint(db, project_id)
+    cached = schedule_cache.get(project_id)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+    schedule = (await load_task_graph(db, project_id)).schedule()
+    schedule_cache.set(project_id, (fingerprint, schedule))
+    return schedule
+
+
+# tasks that depend on task_id directly or through other tasks, with their dates
+# walks only the affected subgraph with a recursive query on (project_id, dependency)
+async def downstream_tasks(db: AsyncSession, project_id: int, task_id: int) -> list:
+    downstream = (
+        select(ProjectTask.task_id)
+        .filter(ProjectTask.project_id == project_id, ProjectTask.dependency == task_id)
+        .cte("downstream", recursive=True)
+    )
+    # UNION (not UNION ALL) drops tasks already reached, so a dependency loop still ends
+    downstream = downstream.union(
+        select(ProjectTask.task_id).join(
+            downstream,
+            (ProjectTask.dependency == downstream.c.task_id)
+            & (ProjectTask.project_id == project_id),
+        )
+    )
+    rows = await db.execute(
+        select(ProjectTask.task_id, ProjectTask.start_date, ProjectTask.end_date)
+        .join(downstream, ProjectTask.task_id == downstream.c.task_id)
+        .filter(ProjectTask.project_id == project_id, ProjectTask.task_id != task_id)
+        .order_by(ProjectTask.task_id)
+    )
+    return rows.all()
+
+
+# how far a date moved, naive datetimes (sqlite, clients without offsets) are taken as UTC
+def date_shift(previous: Optional[datetime], current: Optional[datetime]) -> timedelta:
+    if previous is None or current is None:
+        return timedelta(0)
+    if previous.tzinfo is None:
+        previous = previous.replace(tzinfo=timezone.utc)
+    if current.tzinfo is None:
+        current = current.replace(tzinfo=timezone.utc)
+    return current - previous
+
+
+# move every task downstream of task_id by delta in one executemany UPDATE
+# returns the changed dates so the client can patch its Gantt chart
+async def shift_dependents(
+    db: AsyncSession, project_id: int, task_id: int, delta: timedelta
+) -> list:
+    if not delta:
+        return []
+    shifted = [
+        _date_shift_row(row, delta)
+        for row in await downstream_tasks(db, project_id, task_id)
+        if row.start_date is not None or row.end_date is not None
+    ]
+    await _write_shifts(db, project_id, shifted)
+    return shifted
+
+
+# shift_dependents for several tasks dated in one request (bulk Gantt edits)
+# deltas: task id -> how far its end date moved, for every task the request dated,
+# each downstream task moves with the nearest of them it waits on, the dated tasks
+# themselves keep their new dates
+# every task has at most one dependency, so one pass over the project's tasks finds them
+async def shift_dependents_of_tasks(
+    db: AsyncSession, project_id: int, deltas: dict
+) -> list:
+    if not any(deltas.values()):
+        return []
+    rows = await db.execute(
+        select(
+            ProjectTask.task_id,
+            ProjectTask.dependency,
+            ProjectTask.start_date,
+            ProjectTask.end_date,
+        ).filter(ProjectTask.project_id == project_id)
+    )
+    successors = {}
+    for row in rows:
+        successors.setdefault(row.dependency, []).append(row)
+
+    shifted = []
+    pending = [(task_id, delta) for task_id, delta in deltas.items() if delta]
+    reached = set(deltas)
+    while pending:
+        task_id, delta = pending.pop()
+        for row in successors.get(task_id, ()):
+            # a dated task's dependents follow its own move, walked from it
+            if row.task_id in reached:
+                continue
+            reached.add(row.task_id)
+            if row.start_date is not None or row.end_date is not None:
+                shifted.append(_date_shift_row(row, delta))
+            pending.append((row.task_id, delta))
+    shifted.sort(key=lambda shift: shift["task_id"])
+    await _write_shifts(db, project_id, shifted)
+    return shifted
+
+
+def _date_shift_row(row, delta: timedelta) -> dict:
+    return {
+        "task_id": row.task_id,
+        "previous_start_date": row.start_date,
+        "previous_end_date": row.end_date,
+        "start_date": row.start_date and row.start_date + delta,
+        "end_date": row.end_date and row.end_date + delta,
+    }
+
+
+async def _write_shifts(db: AsyncSession, project_id: int, shifted: list):
+    if not shifted:
+        return
+    await db.execute(
+        update(ProjectTask),
+        [
+            {
+                "project_id": project_id,
+                "task_id": shift["task_id"],
+                "start_date": shift["start_date"],
+                "end_date": shift["end_date"],
+            }
+            for shift in shifted
+        ],
+    )
+    # executemany skips the ORM events
+    schedule_cache.invalidate(project_id)
+    graph_cache.invalidate(project_id)
@@ -0,0 +1,20 @@
+from functools import lru_cache
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+# a TypeAdapter compiles its validator and serializer, build each one once and reuse it
+@lru_cache(maxsize=None)
+def type_adapter(response_type) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+# validate ORM rows (or dicts) into response_type and write the JSON body, one
+# compiled call each for the whole response
+# returning a Response skips FastAPI validating and serializing the response_model again
+def json_response(response_type, data) -> Response:
+    adapter = type_adapter(response_type)
+    return Response(
+        adapter.dump_json(adapter.validate_python(data, from_attributes=True)),
+        media_type="application/json",
+    )
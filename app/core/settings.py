@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 
@@ -8,12 +9,52 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     # Access token settings
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Refresh token settings
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+
+    # Password hashing pool settings
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # "thread" or "process"
+    PASSWORD_HASH_WORKERS: int = 4
+    # hashes allowed to wait for a free worker before new ones get a 503
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+
+    # Authenticated user cache settings
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    # how often the in-memory token revocation table is reloaded from the database
+    TOKEN_REVOCATION_REFRESH_SECONDS: int = 30
 
     # ADMIN_PASSWORD
     ADMIN_PASSWORD: str
 
     # Database settings
     DATABASE_URL: str
+    # optional override, derived from DATABASE_URL when not set
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # SQL instrumentation settings
+    SQL_METRICS_LOG: bool = True
+    # a statement run this many times in one request is reported as a likely N+1
+    SQL_REPEATED_STATEMENT_THRESHOLD: int = 5
+    # test mode: fail requests that run more statements than their budget
+    SQL_QUERY_BUDGET_ENFORCE: bool = False
+    SQL_QUERY_BUDGET_DEFAULT: int = 20
+
+    # Project schedule cache settings
+    SCHEDULE_CACHE_SIZE: int = 1000
+    SCHEDULE_CACHE_TTL_SECONDS: int = 600
+    # task graphs reused by what-if simulations without checking for task changes
+    WHAT_IF_GRAPH_CACHE_SIZE: int = 200
+    WHAT_IF_GRAPH_CACHE_TTL_SECONDS: int = 30
+
+    # Task catalog cache settings
+    TASK_CATALOG_CACHE_SIZE: int = 500
+    # bounds how long another worker serves a catalog after a task is added
+    TASK_CATALOG_CACHE_TTL_SECONDS: int = 60
+
+    # Export settings
+    # rows fetched from the database cursor and written to the response at a time
+    EXPORT_BATCH_SIZE: int = 1000
 
     # Email settings
     # SERVER_EMAIL: str
@@ -23,6 +64,20 @@ class Settings(BaseSettings):
     MAIL_PORT: int = 587
     MAIL_SERVER: str
     MAIL_FROM_NAME: str
+    MAIL_STARTTLS: bool = True
+    MAIL_SSL_TLS: bool = False
+    MAIL_TIMEOUT_SECONDS: int = 30
+    # SMTP connections kept open and reused across messages
+    MAIL_POOL_SIZE: int = 2
+    MAIL_MAX_MESSAGES_PER_CONNECTION: int = 100
+
+    # Email outbox worker settings
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    EMAIL_OUTBOX_POLL_SECONDS: float = 2
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8
+    # retry delay doubles after every failed attempt, up to the max
+    EMAIL_OUTBOX_RETRY_BASE_SECONDS: int = 30
+    EMAIL_OUTBOX_RETRY_MAX_SECONDS: int = 3600
 
     FRONTEND_URL: str = "http://localhost:3000"
 
@@ -0,0 +1,118 @@
+import json
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+from fastapi import Depends, Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette import status
+from starlette.responses import JSONResponse
+from app.core.settings import settings
+
+
+# statements run while handling one request
+class RequestSQLStats:
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+        # statement text -> times run, the same text run many times is usually an N+1
+        self.shapes = Counter()
+        # max statements for the endpoint, set by query_budget()
+        self.budget: Optional[int] = None
+
+    def record(self, statement: str, seconds: float):
+        self.statements += 1
+        self.seconds += seconds
+        self.shapes[" ".join(statement.split())] += 1
+
+    def repeated(self) -> dict:
+        return {
+            shape: count
+            for shape, count in self.shapes.items()
+            if count >= settings.SQL_REPEATED_STATEMENT_THRESHOLD
+        }
+
+
+_request_stats: ContextVar[Optional[RequestSQLStats]] = ContextVar(
+    "request_sql_stats", default=None
+)
+
+
+# the start time lives on the statement's execution context, which is dropped with it,
+# so a statement that raises leaves nothing behind on the pooled connection
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_start_time
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+
+# hook statement timing into an engine, for the async engine pass async_engine.sync_engine
+def instrument_engine(engine: Engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def get_request_stats() -> Optional[RequestSQLStats]:
+    return _request_stats.get()
+
+
+# per-endpoint statement budget, used as dependencies=[query_budget(3)] on a route
+def query_budget(max_statements: int):
+    def set_budget():
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.budget = max_statements
+
+    return Depends(set_budget)
+
+
+async def sql_metrics_middleware(request: Request, call_next):
+    stats = RequestSQLStats()
+    token = _request_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        _request_stats.reset(token)
+
+    db_ms = stats.seconds * 1000
+    response.headers["Server-Timing"] = (
+        f'db;dur={db_ms:.1f};desc="{stats.statements} statements"'
+    )
+
+    repeated = stats.repeated()
+    if settings.SQL_METRICS_LOG:
+        print(
+            json.dumps(
+                {
+                    "event": "request_sql",
+                    "method": request.method,
+                    "path": request.url.path,
+                    "status": response.status_code,
+                    "statements": stats.statements,
+                    "db_ms": round(db_ms, 2),
+                    "repeated": [
+                        {"statement": shape[:200], "count": count}
+                        for shape, count in repeated.items()
+                    ],
+                }
+            )
+        )
+
+    # test mode: turn a blown query budget into a failed request so it can't go unnoticed
+    budget = stats.budget or settings.SQL_QUERY_BUDGET_DEFAULT
+    if settings.SQL_QUERY_BUDGET_ENFORCE and stats.statements > budget:
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={
+                "detail": f"Query budget exceeded: {stats.statements} statements, "
+                f"budget {budget}",
+                "repeated": repeated,
+            },
+        )
+    return response
@@ -0,0 +1,103 @@
+from bisect import bisect_right
+from collections import defaultdict
+from types import MappingProxyType
+from typing import List, Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from app.core.cache import TTLCache
+from app.core.readonly import row_dicts, select_schema
+from app.core.serialization import type_adapter
+from app.core.settings import settings
+from app.models.task import Task
+from app.schemas.task import TaskBase, TaskWithChildren
+
+
+def _task_key(task: TaskBase) -> tuple:
+    return (task.sort_order, task.id)
+
+
+# one company's task catalog, categories (top-level tasks) and their subtasks in
+# (sort_order, id) order, built once per catalog version and only read afterwards
+class TaskCatalog:
+    def __init__(self, tasks: List[TaskBase]):
+        tasks = sorted(tasks, key=_task_key)
+        children = defaultdict(list)
+        for task in tasks:
+            if task.parent_id is not None:
+                children[task.parent_id].append(task)
+        self.children = MappingProxyType(
+            {parent_id: tuple(rows) for parent_id, rows in children.items()}
+        )
+        self.categories = tuple(task for task in tasks if task.parent_id is None)
+        self._category_keys = tuple(_task_key(task) for task in self.categories)
+        self.categories_with_children = tuple(
+            TaskWithChildren(
+                **task.model_dump(), children=list(self.children.get(task.id, ()))
+            )
+            for task in self.categories
+        )
+        self.categories_json = type_adapter(List[TaskBase]).dump_json(
+            list(self.categories)
+        )
+
+    def subtasks(self, parent_id: int) -> tuple:
+        return self.children.get(parent_id, ())
+
+    # categories with their subtasks after the (sort_order, id) key of the last one sent
+    def categories_after(self, after: Optional[tuple] = None) -> tuple:
+        start = bisect_right(self._category_keys, after) if after is not None else 0
+        return self.categories_with_children[start:]
+
+
+# catalogs by (company id, catalog version), a write moves the company to a new key
+# so a catalog loaded while the write committed is never served afterwards
+# other processes pick up the change when their entry expires
+catalog_cache = TTLCache(
+    maxsize=settings.TASK_CATALOG_CACHE_SIZE,
+    ttl=settings.TASK_CATALOG_CACHE_TTL_SECONDS,
+)
+catalog_versions: dict = {}
+
+
+def bump_catalog_version(company_id: Optional[int]):
+    version = catalog_versions.get(company_id, 0)
+    catalog_cache.invalidate((company_id, version))
+    catalog_versions[company_id] = version + 1
+
+
+# remember which companies' tasks a flush wrote, their catalogs change once it commits
+# bulk insert()/update() statements skip these events, call bump_catalog_version after them
+@event.listens_for(Task, "after_insert")
+@event.listens_for(Task, "after_update")
+@event.listens_for(Task, "after_delete")
+def record_catalog_change(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("task_catalog_companies", set()).add(target.company_id)
+
+
+@event.listens_for(Session, "after_commit")
+def bump_committed_catalogs(session):
+    for company_id in session.info.pop("task_catalog_companies", ()):
+        bump_catalog_version(company_id)
+
+
+async def load_task_catalog(db: AsyncSession, company_id: int) -> TaskCatalog:
+    tasks = row_dicts(
+        await db.execute(
+            select_schema(Task, TaskBase).filter(Task.company_id == company_id)
+        )
+    )
+    return TaskCatalog(type_adapter(List[TaskBase]).validate_python(tasks))
+
+
+# the company's catalog, loaded with one query when its version is not cached
+async def get_task_catalog(db: AsyncSession, company_id: int) -> TaskCatalog:
+    # read the version before loading, a write committing meanwhile bumps it past this key
+    key = (company_id, catalog_versions.get(company_id, 0))
+    catalog = catalog_cache.get(key)
+    if catalog is None:
+        catalog = await load_task_catalog(db, company_id)
+        catalog_cache.set(key, catalog)
+    return catalog
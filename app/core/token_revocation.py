@@ -0,0 +1,107 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import delete, select
+from app.core.settings import settings
+from app.database import AsyncSessionLocal
+from app.models.deleted_user import DeletedUser
+from app.models.user import User
+
+# in-memory revocation table so access tokens can be checked without a users query
+# user id -> epoch seconds, tokens issued before it are rejected
+# inactive users are not listed: login and refresh never issue them tokens
+_revoked_before: dict[int, float] = {}
+# users deleted within the access token lifetime, older tokens have expired anyway
+_deleted_ids: set[int] = set()
+_refresh_task: Optional[asyncio.Task] = None
+
+
+# token iat is in whole seconds, so cutoffs are floored to match
+def _epoch(value) -> float:
+    # sqlite hands back naive datetimes, they are stored as UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return float(int(value.timestamp()))
+
+
+async def refresh_revocations():
+    global _revoked_before, _deleted_ids
+    deleted_since = datetime.now(timezone.utc) - timedelta(
+        minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
+    )
+    async with AsyncSessionLocal() as db:
+        rows = (
+            await db.execute(
+                select(User.id, User.tokens_valid_after).filter(
+                    User.tokens_valid_after.is_not(None)
+                )
+            )
+        ).all()
+        deleted_ids = (
+            await db.scalars(
+                select(DeletedUser.user_id).filter(
+                    DeletedUser.deleted_at > deleted_since
+                )
+            )
+        ).all()
+        # rows past the token lifetime reject nothing anymore, prune them so the table
+        # stays as small as the set it feeds
+        await db.execute(
+            delete(DeletedUser).filter(DeletedUser.deleted_at <= deleted_since)
+        )
+        await db.commit()
+
+    _revoked_before = {
+        user_id: _epoch(tokens_valid_after) for user_id, tokens_valid_after in rows
+    }
+    _deleted_ids = set(deleted_ids)
+
+
+def is_token_revoked(user_id: int, issued_at: float) -> bool:
+    if user_id in _deleted_ids:
+        return True
+    cutoff = _revoked_before.get(user_id)
+    return cutoff is not None and issued_at < cutoff
+
+
+# apply a change right away in this worker, other workers see it on their next refresh
+def revoke_user_tokens(user_id: int, before: Optional[float] = None):
+    _revoked_before[user_id] = before if before is not None else float(int(time.time()))
+
+
+def mark_user_deleted(user_id: int):
+    _deleted_ids.add(user_id)
+
+
+async def _refresh_loop():
+    while True:
+        try:
+            await refresh_revocations()
+        except Exception as e:
+            print("Token revocation refresh failed:", str(e))
+        await asyncio.sleep(settings.TOKEN_REVOCATION_REFRESH_SECONDS)
+
+
+def start_revocation_refresh():
+    global _refresh_task
+    if _refresh_task is None:
+        _refresh_task = asyncio.create_task(_refresh_loop())
+
+
+async def stop_revocation_refresh():
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
+
+
+def get_revocation_metrics() -> dict:
+    return {
+        "revoked_users": len(_revoked_before),
+        "deleted_users": len(_deleted_ids),
+    }
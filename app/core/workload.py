@@ -0,0 +1,98 @@
+from bisect import bisect_right
+from datetime import date, timedelta
+from functools import lru_cache
+from itertools import accumulate
+
+
+# the dates of a calendar range, shared by every contractor in a request
+@lru_cache(maxsize=32)
+def _dates(start: date, size: int) -> tuple:
+    return tuple(start + timedelta(days=d) for d in range(size))
+
+
+# one contractor's calendar between start and end (end exclusive) from their assignments
+# assignments: (project_id, task_id, start_date, end_date), a task occupies the days from
+# its start date up to its end date, and at least its start day
+# a sweep over start/end events (difference array + running sum), O(n log n + days),
+# so overlaps are found without comparing assignments pairwise
+def contractor_calendar(
+    assignments: list, start: date, end: date, granularity: str = "day"
+) -> dict:
+    size = (end - start).days
+    base = start.toordinal()
+    dates = _dates(start, size)
+    starts = [0] * (size + 1)
+    intervals = []
+    for project_id, task_id, task_start, task_end in assignments:
+        # toordinal() works on both dates and datetimes and ignores the time of day
+        first = task_start.toordinal() - base
+        last = max((task_end or task_start).toordinal() - base, first + 1)
+        first, last = max(first, 0), min(last, size)
+        if first < last:
+            starts[first] += 1
+            starts[last] -= 1
+            intervals.append((first, last, project_id, task_id))
+    # concurrent[d]: number of tasks on day start + d
+    concurrent = list(accumulate(starts))[:size]
+
+    if granularity == "week":
+        periods = []
+        # the first week starts on the monday on or before start
+        for first in range(-start.weekday(), size, 7):
+            days = concurrent[max(first, 0) : first + 7]
+            busy_days = len(days) - days.count(0)
+            if busy_days:
+                periods.append(
+                    {
+                        "period": start + timedelta(days=first),
+                        "busy_days": busy_days,
+                        "assigned_days": sum(days),
+                        "peak_concurrent": max(days),
+                        "utilization": round(busy_days / 7, 4),
+                    }
+                )
+    else:
+        periods = [
+            {
+                "period": dates[day],
+                "busy_days": 1,
+                "assigned_days": count,
+                "peak_concurrent": count,
+                "utilization": 1.0,
+            }
+            for day, count in enumerate(concurrent)
+            if count
+        ]
+
+    # runs of days with two or more tasks at once are conflicts
+    windows = []
+    run_start = None
+    for day, count in enumerate(concurrent + [0]):
+        if count > 1 and run_start is None:
+            run_start = day
+        elif count <= 1 and run_start is not None:
+            windows.append((run_start, day))
+            run_start = None
+    window_starts = [first for first, _ in windows]
+    tasks = [set() for _ in windows]
+    for first, last, project_id, task_id in intervals:
+        # windows starting before the task ends, the task overlaps those ending after it starts
+        w = bisect_right(window_starts, last - 1) - 1
+        while w >= 0 and windows[w][1] > first:
+            tasks[w].add((project_id, task_id))
+            w -= 1
+
+    return {
+        "periods": periods,
+        "conflicts": [
+            {
+                "start_date": dates[first],
+                "end_date": end if last == size else dates[last],
+                "tasks": [
+                    {"project_id": project_id, "task_id": task_id}
+                    for project_id, task_id in sorted(window_tasks)
+                ],
+            }
+            for (first, last), window_tasks in zip(windows, tasks)
+        ],
+    }
@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.settings import settings
 
@@ -9,6 +11,30 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # which enable us to define our database tables as classes (ORM)
 Base = declarative_base()
 
+# async drivers for the sync urls in DATABASE_URL, e.g. postgresql:// -> postgresql+asyncpg://
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    db_url = make_url(url)
+    backend = db_url.get_backend_name()
+    if backend in ASYNC_DRIVERS:
+        db_url = db_url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return db_url.render_as_string(hide_password=False)
+
+
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL)
+)
+# expire_on_commit=False so returned objects can still be read after commit
+# without triggering a lazy load outside of an awaitable context
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 # connect to database
 
 
@@ -18,3 +44,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# async version of get_db, used by the routers so queries don't block the event loop
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -5,13 +5,12 @@ from app.models.city import City
 from app.models.user import User
 from app.models.task import Task
 from app.models.company import Company
-from passlib.context import CryptContext
 from sqlalchemy.exc import SQLAlchemyError
 from app.models.user import Role
 from sqlalchemy import select
 from app.core.settings import settings
+from app.core.hashing import pwd_context
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 password = settings.ADMIN_PASSWORD
 db = SessionLocal()
 
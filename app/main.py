@@ -1,8 +1,17 @@
 from fastapi import FastAPI, HTTPException, Depends
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Annotated
-from app.database import SessionLocal, engine, get_db, Base
-from sqlalchemy.orm import Session
+from app.database import SessionLocal, engine, async_engine, get_async_db, Base
+from app.core.hashing import shutdown_executor
+from app.core.email import load_templates, smtp_pool
+from app.core.geo import load_geo_data
+from app.core.sql_metrics import instrument_engine, sql_metrics_middleware
+from app.core.token_revocation import (
+    start_revocation_refresh,
+    stop_revocation_refresh,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User as UserModel
 import app.routes.user as User
 import app.routes.auth as Auth
@@ -10,6 +19,8 @@ import app.routes.project as Project
 import app.routes.province as Province
 import app.routes.task as Task
 import app.routes.analytics as Analytics
+import app.routes.metrics as Metrics
+import app.routes.export as Export
 
 # import app.routes.project as Project
 import starlette.status as status
@@ -27,11 +38,16 @@ import app.models
 
 
 # Create a FastAPI instance
-app = FastAPI()
+# orjson renders the JSON body several times faster than the standard library
+app = FastAPI(default_response_class=ORJSONResponse)
 
 Base.metadata.create_all(bind=engine)  # create all tables in database
 
-db_dependency = Annotated[Session, Depends(get_db)]
+# count and time SQL statements per request
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 user_dependency = Annotated[UserModel, Depends(get_current_user)]
 
 
@@ -43,12 +59,29 @@ async def startup_event():
     initialize_canadian_province()
     # initialize Canadian cities
     initialize_canadian_cities()
+    # keep provinces and cities in memory, they only change with the seed data
+    await load_geo_data()
     # initialize Raynow as first company
     initial_company()
     # initialize admin user
     initial_admin()
     # initialize predefined tasks
     initialize_parent_tasks()
+    # compile email templates once
+    load_templates()
+    # keep the token revocation table in sync with the users table
+    start_revocation_refresh()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await stop_revocation_refresh()
+    # close pooled async connections
+    await async_engine.dispose()
+    # stop the password hashing pool
+    shutdown_executor()
+    # close open SMTP sessions
+    await smtp_pool.close()
 
 
 @app.get("/", status_code=status.HTTP_200_OK)
@@ -60,6 +93,8 @@ async def read_user(user: user_dependency, db: db_dependency):
     return {"User": user}
 
 
+app.middleware("http")(sql_metrics_middleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -80,6 +115,9 @@ app.include_router(Province.router)
 app.include_router(Task.router)
 # analytics router
 app.include_router(Analytics.router)
+app.include_router(Metrics.router)
+# export router
+app.include_router(Export.router)
 
 # if __name__ == "main":
 #     uvicorn.run("app.main:app", host:"0.0.0.0", port=8080, reload=True)
@@ -8,3 +8,6 @@ from .project_tracking import ProjectTracking
 from .notification import Notification
 from .project_task import ProjectTask
 from .company import Company
+from .refresh_token import RefreshToken
+from .email_outbox import EmailOutbox
+from .deleted_user import DeletedUser
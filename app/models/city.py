@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -15,3 +15,8 @@ class City(Base):
 
     # through the relationship, we can access the province object from the city object
     province = relationship("Province", back_populates="cities")
+
+    # the paginated city list walks a province's cities by name
+    __table_args__ = (
+        Index("ix_cities_province_id_name_id", "province_id", "name", "id"),
+    )
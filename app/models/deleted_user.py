@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, DateTime, func
+from app.database import Base
+
+
+# DeletedUser model, ids of deleted users so their access tokens can be rejected
+# until they expire, no foreign key since the user row is gone
+class DeletedUser(Base):
+    __tablename__ = "deleted_users"
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    deleted_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
+    )
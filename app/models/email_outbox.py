@@ -0,0 +1,44 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DateTime,
+    func,
+    Enum,
+    JSON,
+    Index,
+)
+from app.database import Base
+from enum import Enum as PyEnum
+
+
+class EmailStatus(PyEnum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+# EmailOutbox model, rows are written by request handlers and delivered by app.workers.email_worker
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    email_to = Column(String(255), nullable=False)
+    subject = Column(String(200), nullable=False)
+    template_name = Column(String(50), nullable=False)
+    data = Column(JSON, nullable=False, default=dict)
+    status = Column(Enum(EmailStatus), nullable=False, default=EmailStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    last_error = Column(String(500), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    # time from the request enqueueing the email to the SMTP server accepting it
+    delivery_latency_ms = Column(Integer, nullable=True)
+
+    # the worker polls for due pending rows
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
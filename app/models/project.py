@@ -9,6 +9,8 @@ from sqlalchemy import (
     Enum,
     Interval,
     event,
+    Index,
+    literal_column,
 )
 from app.database import Base
 from enum import Enum as PyEnum
@@ -63,11 +65,43 @@ class Project(Base):
     estimated_duration = Column(Integer, nullable=True)  # in days
     end_date = Column(DateTime(timezone=True), nullable=True)
     actual_end_date = Column(DateTime(timezone=True), nullable=True)
+    # rollups of the project's tasks, kept in step by the ProjectTask events in project_task.py
+    actual_budget = Column(Float, nullable=False, default=0, server_default="0")
+    amount_due_total = Column(Float, nullable=False, default=0, server_default="0")
+    pending_task_count = Column(Integer, nullable=False, default=0, server_default="0")
+    in_progress_task_count = Column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    completed_task_count = Column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    delayed_task_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # bumped in SQL by every UPDATE of the project, including the task rollups, so it
+    # changes with any edit to the project or its tasks (the project detail ETag)
+    version = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        server_default="0",
+        onupdate=literal_column("version") + 1,
+    )
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
+    # company dashboards and duration analytics filter on company and status, newest first
+    # the paginated project list walks a company's projects in id order
+    __table_args__ = (
+        Index(
+            "ix_projects_company_id_status_created_at",
+            "company_id",
+            "status",
+            "created_at",
+        ),
+        Index("ix_projects_company_id_id", "company_id", "id"),
+    )
+
 
 @event.listens_for(Project, "before_insert")
 @event.listens_for(Project, "before_update")
@@ -1,5 +1,22 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, func, Enum
+from collections import Counter
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    ForeignKey,
+    Float,
+    DateTime,
+    func,
+    Enum,
+    Index,
+    event,
+    inspect,
+    update,
+)
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.attributes import set_committed_value
 from app.database import Base
+from app.models.project import Project
 from enum import Enum as PyEnum
 
 
@@ -18,7 +35,7 @@ class ProjectTask(Base):
         Integer, ForeignKey("projects.id"), primary_key=True, nullable=False
     )
     task_id = Column(Integer, ForeignKey("tasks.id"), primary_key=True, nullable=False)
-    assignee_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    assignee_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     status = Column(Enum(TaskStatus), nullable=False, default=TaskStatus.PENDING)
     start_date = Column(DateTime(timezone=True), nullable=True)
     end_date = Column(DateTime(timezone=True), nullable=True)
@@ -32,3 +49,124 @@ class ProjectTask(Base):
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
+
+    # reverse-dependency lookups: which tasks of the project wait on this one
+    __table_args__ = (
+        Index("ix_project_tasks_project_id_dependency", "project_id", "dependency"),
+    )
+
+
+# Project rollup column counting the tasks in each status
+STATUS_COUNT_COLUMNS = {
+    TaskStatus.PENDING: Project.pending_task_count,
+    TaskStatus.IN_PROGRESS: Project.in_progress_task_count,
+    TaskStatus.COMPLETED: Project.completed_task_count,
+    TaskStatus.DELAYED: Project.delayed_task_count,
+}
+
+ROLLUP_COLUMNS = [
+    Project.actual_budget,
+    Project.amount_due_total,
+    *STATUS_COUNT_COLUMNS.values(),
+]
+
+
+# UPDATE adding deltas to a project's rollups, statuses maps TaskStatus -> +n/-n tasks
+# done in SQL (col = col + delta) so concurrent task changes don't overwrite each other
+# with no deltas it only touches the project, every task change bumps Project.version
+# ORM changes to ProjectTask apply it automatically, bulk insert/update/delete must run it themselves
+def project_rollup_update(
+    project_id: int, budget: float = 0, amount_due: float = 0, statuses: dict = None
+):
+    values = {}
+    if budget:
+        values[Project.actual_budget] = Project.actual_budget + budget
+    if amount_due:
+        values[Project.amount_due_total] = Project.amount_due_total + amount_due
+    for task_status, delta in (statuses or {}).items():
+        if delta:
+            column = STATUS_COUNT_COLUMNS[task_status]
+            values[column] = column + delta
+    if not values:
+        # nothing to add, still bump the version so the project records the task change
+        values[Project.version] = Project.version + 1
+    return update(Project).filter(Project.id == project_id).values(values)
+
+
+# the ProjectTask mapper events only collect deltas, by project id, in session.info
+# apply_project_rollups runs one UPDATE per project when the flush ends, so a flush
+# writing N tasks of a project (create_project, delete_project) doesn't run N UPDATEs
+def _add_rollup(target, budget=0, amount_due=0, statuses=None):
+    rollups = object_session(target).info.setdefault("project_rollups", {})
+    rollup = rollups.setdefault(target.project_id, [0, 0, Counter()])
+    rollup[0] += budget
+    rollup[1] += amount_due
+    rollup[2].update(statuses or {})
+
+
+def _previous(target, key):
+    history = inspect(target).attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, key)
+
+
+@event.listens_for(ProjectTask, "after_insert")
+def add_to_project_rollups(mapper, connection, target):
+    _add_rollup(
+        target,
+        budget=target.budget or 0,
+        amount_due=target.amount_due or 0,
+        statuses={target.status or TaskStatus.PENDING: 1},
+    )
+
+
+@event.listens_for(ProjectTask, "after_update")
+def update_project_rollups(mapper, connection, target):
+    statuses = Counter()
+    statuses[_previous(target, "status")] -= 1
+    statuses[target.status] += 1
+    _add_rollup(
+        target,
+        budget=(target.budget or 0) - (_previous(target, "budget") or 0),
+        amount_due=(target.amount_due or 0) - (_previous(target, "amount_due") or 0),
+        statuses=statuses,
+    )
+
+
+@event.listens_for(ProjectTask, "after_delete")
+def remove_from_project_rollups(mapper, connection, target):
+    _add_rollup(
+        target,
+        budget=-(target.budget or 0),
+        amount_due=-(target.amount_due or 0),
+        statuses={target.status: -1},
+    )
+
+
+# deltas left by a flush that failed were never written, don't apply them with the next one
+@event.listens_for(Session, "before_flush")
+def reset_project_rollups(session, flush_context, instances):
+    session.info.pop("project_rollups", None)
+
+
+@event.listens_for(Session, "after_flush")
+def apply_project_rollups(session, flush_context):
+    rollups = session.info.pop("project_rollups", None)
+    if not rollups:
+        return
+    connection = session.connection()
+    for project_id, (budget, amount_due, statuses) in rollups.items():
+        project = session.identity_map.get(session.identity_key(Project, project_id))
+        # deleted in this same flush, along with its tasks
+        if project is not None and project in session.deleted:
+            continue
+        statement = project_rollup_update(project_id, budget, amount_due, statuses)
+        values = connection.execute(
+            statement.returning(*ROLLUP_COLUMNS, Project.version)
+        ).one_or_none()
+
+        # keep a Project already loaded in this session current without reloading it
+        if project is not None and values is not None:
+            for column, value in zip([*ROLLUP_COLUMNS, Project.version], values):
+                set_committed_value(project, column.key, value)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Index
 from app.database import Base
 
 
@@ -17,3 +17,8 @@ class Task(Base):
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
+
+    # task catalog lookups filter on company and parent
+    __table_args__ = (
+        Index("ix_tasks_company_id_parent_id", "company_id", "parent_id"),
+    )
@@ -1,5 +1,14 @@
 # define data table
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Enum,
+    Index,
+)
 from app.database import Base
 from sqlalchemy.sql import func
 from enum import Enum as PyEnum
@@ -21,10 +30,15 @@ class User(Base):
     password = Column(String(128), nullable=False)
     is_admin = Column(Boolean, default=False, nullable=False)
     role = Column(Enum(Role), default=Role.CONTRACTOR, nullable=False)
-    verification_code = Column(String(10), nullable=True)
+    verification_code = Column(String(10), nullable=True, index=True)
     expires_at = Column(DateTime(timezone=True), nullable=True)
     is_active = Column(Boolean, default=False, nullable=False)
+    # access tokens issued before this time are rejected (password reset, email change)
+    tokens_valid_after = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
+
+    # the paginated user list walks a company's users in id order
+    __table_args__ = (Index("ix_users_company_id_id", "company_id", "id"),)
@@ -1,22 +1,27 @@
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from itertools import groupby
 from fastapi import HTTPException, APIRouter, Depends, Query
-from typing import Annotated, List, Optional
-from sqlalchemy import func
-from sqlalchemy.orm import Session
-from app.database import get_db
+from typing import Annotated, List, Literal, Optional, Union
+from sqlalchemy import extract, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.sql_metrics import query_budget
+from app.core.workload import contractor_calendar
+from app.database import get_async_db
 from app.models.project_task import ProjectTask
 from app.models.task import Task
 from app.routes.auth import get_current_admin
 from app.models.project import Project, ProjectStatus, ProjectPriority
 from app.models.user import User
 from app.schemas.analytics import (
+    BudgetPeriodResponse,
+    ContractorWorkloadResponse,
     ProjectBudgetResponse,
     ProjectDurationResponse,
     ProjectSummaryResponse,
 )
 
 router = APIRouter(tags=["analytics"], prefix="/analytics")
-db_dependence = Annotated[Session, Depends(get_db)]
+db_dependence = Annotated[AsyncSession, Depends(get_async_db)]
 
 
 #
@@ -25,15 +30,18 @@ async def get_projects_duration_comparison(
     db: db_dependence, current_user: Annotated[User, Depends(get_current_admin)]
 ):
     db_projects = (
-        db.query(Project)
-        .filter(
-            Project.company_id == current_user.company_id,
-            Project.status == ProjectStatus.COMPLETED,  # only completed projects
+        await db.scalars(
+            select(Project)
+            .filter(
+                Project.company_id == current_user.company_id,
+                Project.status == ProjectStatus.COMPLETED,  # only completed projects
+            )
+            .order_by(
+                Project.created_at.desc()
+            )  # order by created_at in descending order
+            .limit(10)  # limit to 10 projects
         )
-        .order_by(Project.created_at.desc())  # order by created_at in descending order
-        .limit(10)  # limit to 10 projects
-        .all()
-    )
+    ).all()
 
     if not db_projects:
         raise HTTPException(status_code=404, detail="No projects found")
@@ -55,20 +63,29 @@ async def get_projects_duration_comparison(
     return result
 
 
-@router.post("/budget", response_model=List[ProjectBudgetResponse])
+# estimated vs actual (sum of task budgets) per project, or per month/quarter of start_date
+# one query scoped to the caller's company, actual_budget is the rollup kept on the project
+@router.post(
+    "/budget",
+    response_model=Union[List[ProjectBudgetResponse], List[BudgetPeriodResponse]],
+    dependencies=[query_budget(1)],
+)
 async def get_projects_budget_comparison(
     db: db_dependence,
     current_user: Annotated[User, Depends(get_current_admin)],
     start_date: Optional[str] = Query(None, description="Start date in YYYY-MM-DD"),
     end_date: Optional[str] = Query(None, description="End date in YYYY-MM-DD"),
+    period: Optional[Literal["month", "quarter"]] = Query(
+        None, description="Group projects by month or quarter of start_date"
+    ),
 ):
-    query = db.query(Project)
+    filters = [Project.company_id == current_user.company_id]
 
     # Filter by start_date and end_date
     if start_date:
         try:
             start_date_obj = datetime.strptime(start_date, "%Y-%m-%d")
-            query = query.filter(Project.start_date >= start_date_obj)
+            filters.append(Project.start_date >= start_date_obj)
         except ValueError:
             raise HTTPException(
                 status_code=400, detail="Invalid start_date format. Use YYYY-MM-DD"
@@ -77,37 +94,143 @@ async def get_projects_budget_comparison(
     if end_date:
         try:
             end_date_obj = datetime.strptime(end_date, "%Y-%m-%d")
-            query = query.filter(Project.start_date <= end_date_obj)
+            filters.append(Project.start_date <= end_date_obj)
         except ValueError:
             raise HTTPException(
                 status_code=400, detail="Invalid end_date format. Use YYYY-MM-DD"
             )
 
-    projects = query.order_by(
-        Project.budget.desc()
-    ).all()  # order by budget in descending order
+    if period is None:
+        rows = (
+            await db.execute(
+                select(
+                    Project.name,
+                    Project.budget.label("estimate_budget"),
+                    Project.actual_budget,
+                )
+                .filter(*filters)
+                .order_by(Project.budget.desc())  # order by budget in descending order
+            )
+        ).all()
+        if not rows:
+            raise HTTPException(status_code=404, detail="No projects found")
+        return [row._asdict() for row in rows]
 
-    if not projects:
+    # group by calendar month in SQL, quarters are folded from the (at most 12 per year) months
+    year = extract("year", Project.start_date).label("year")
+    month = extract("month", Project.start_date).label("month")
+    rows = (
+        await db.execute(
+            select(
+                year,
+                month,
+                func.count(Project.id).label("project_count"),
+                func.sum(Project.budget).label("estimate_budget"),
+                func.sum(Project.actual_budget).label("actual_budget"),
+            )
+            .filter(*filters, Project.start_date.isnot(None))
+            .group_by(year, month)
+            .order_by(year, month)
+        )
+    ).all()
+    if not rows:
         raise HTTPException(status_code=404, detail="No projects found")
 
-    project_data = []
-    for project in projects:
-        # sum of all task budgets for the project
-        actual_budget = (
-            db.query(func.sum(ProjectTask.budget))
-            .filter(ProjectTask.project_id == project.id)
-            .scalar()
-        ) or 0  # default to 0 if no tasks
+    periods = {}
+    for row in rows:
+        if period == "quarter":
+            label = f"{int(row.year)}-Q{(int(row.month) - 1) // 3 + 1}"
+        else:
+            label = f"{int(row.year)}-{int(row.month):02d}"
+        totals = periods.setdefault(
+            label,
+            {
+                "period": label,
+                "project_count": 0,
+                "estimate_budget": 0,
+                "actual_budget": 0,
+            },
+        )
+        totals["project_count"] += row.project_count
+        totals["estimate_budget"] += row.estimate_budget or 0
+        totals["actual_budget"] += row.actual_budget or 0
+    return list(periods.values())
+
 
-        project_data.append(
+# per-contractor utilization and double-booked periods across the company's projects
+# one query for the assignments in range, then a sorted sweep per contractor
+@router.post(
+    "/workload",
+    response_model=List[ContractorWorkloadResponse],
+    dependencies=[query_budget(1)],
+)
+async def get_contractor_workload(
+    db: db_dependence,
+    current_user: Annotated[User, Depends(get_current_admin)],
+    start_date: Optional[str] = Query(None, description="Start date in YYYY-MM-DD"),
+    end_date: Optional[str] = Query(None, description="End date in YYYY-MM-DD"),
+    granularity: Literal["day", "week"] = Query("day"),
+):
+    try:
+        range_start = (
+            datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
+        ) or datetime.combine(date.today(), datetime.min.time())
+        range_end = (
+            datetime.strptime(end_date, "%Y-%m-%d") if end_date else None
+        ) or range_start + timedelta(days=28)
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail="Invalid date format. Use YYYY-MM-DD"
+        )
+    if not range_start < range_end <= range_start + timedelta(days=366):
+        raise HTTPException(
+            status_code=400,
+            detail="end_date must be after start_date and at most a year later",
+        )
+
+    rows = (
+        await db.execute(
+            select(
+                User.id,
+                User.first_name,
+                User.last_name,
+                ProjectTask.project_id,
+                ProjectTask.task_id,
+                ProjectTask.start_date,
+                ProjectTask.end_date,
+            )
+            .join(ProjectTask, ProjectTask.assignee_id == User.id)
+            .join(Project, Project.id == ProjectTask.project_id)
+            .filter(
+                Project.company_id == current_user.company_id,
+                ProjectTask.start_date.isnot(None),
+                ProjectTask.start_date < range_end,
+                func.coalesce(ProjectTask.end_date, ProjectTask.start_date)
+                >= range_start,
+            )
+            .order_by(User.id)
+        )
+    ).all()
+
+    result = []
+    for (user_id, first_name, last_name), assignments in groupby(
+        rows, key=lambda row: (row.id, row.first_name, row.last_name)
+    ):
+        calendar = contractor_calendar(
+            [row[3:] for row in assignments],
+            range_start.date(),
+            range_end.date(),
+            granularity,
+        )
+        result.append(
             {
-                "name": project.name,
-                "estimate_budget": project.budget,
-                "actual_budget": actual_budget,
+                "user_id": user_id,
+                "first_name": first_name,
+                "last_name": last_name,
+                **calendar,
             }
         )
-
-    return project_data
+    return result
 
 
 @router.post("/{id}", response_model=ProjectSummaryResponse)
@@ -117,43 +240,45 @@ async def get_project_detail_comparison(
     current_user: Annotated[User, Depends(get_current_admin)],
 ):
     # get project by id
-    project = db.query(Project).filter(Project.id == id).first()
+    project = await db.scalar(select(Project).filter(Project.id == id))
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    # calculate project completion (percentage)
-    total_tasks = db.query(ProjectTask).filter(ProjectTask.project_id == id).count()
-    completed_tasks = (
-        db.query(ProjectTask)
-        .filter(
-            ProjectTask.project_id == id, ProjectTask.status == ProjectStatus.COMPLETED
-        )
-        .count()
+    # calculate project completion (percentage) from the task counts kept on the project
+    total_tasks = (
+        project.pending_task_count
+        + project.in_progress_task_count
+        + project.completed_task_count
+        + project.delayed_task_count
     )
     completion = (
-        round((completed_tasks / total_tasks) * 100, 2) if total_tasks > 0 else 0
+        round((project.completed_task_count / total_tasks) * 100, 2)
+        if total_tasks > 0
+        else 0
     )
 
     # get task budgets
     task_budgets = (
-        db.query(Task.name, ProjectTask.budget)
-        .join(ProjectTask, Task.id == ProjectTask.task_id)
-        .filter(ProjectTask.project_id == id)
-        .all()
-    )
+        await db.execute(
+            select(Task.name, ProjectTask.budget)
+            .join(ProjectTask, Task.id == ProjectTask.task_id)
+            .filter(ProjectTask.project_id == id)
+        )
+    ).all()
 
     # get task durations
     task_durations = (
-        db.query(
-            Task.name,
-            ProjectTask.duration,
-            ProjectTask.actual_end_date,
-            ProjectTask.start_date,
+        await db.execute(
+            select(
+                Task.name,
+                ProjectTask.duration,
+                ProjectTask.actual_end_date,
+                ProjectTask.start_date,
+            )
+            .join(ProjectTask, Task.id == ProjectTask.task_id)
+            .filter(ProjectTask.project_id == id)
         )
-        .join(ProjectTask, Task.id == ProjectTask.task_id)
-        .filter(ProjectTask.project_id == id)
-        .all()
-    )
+    ).all()
 
     return {
         "project_name": project.name,
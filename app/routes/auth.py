@@ -1,10 +1,14 @@
 from datetime import datetime, timedelta
 from typing import Annotated
-from fastapi import Depends, HTTPException, APIRouter, status, BackgroundTasks
+from fastapi import Depends, HTTPException, APIRouter, status
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.core.email import send_email
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.core.email import queue_email
+from app.core.hashing import hash_password, verify_password
+from app.core.cache import TTLCache
+from app.core.token_revocation import is_token_revoked, revoke_user_tokens
 from datetime import datetime, timezone
 
 # includes common used http status code, make it easier to read
@@ -12,7 +16,7 @@ from starlette import status
 from app.database import SessionLocal
 from app.models.user import User, Role
 from app.models.company import Company
-from passlib.context import CryptContext
+from app.models.refresh_token import RefreshToken
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from app.schemas.user import UserBase
@@ -23,12 +27,17 @@ from app.schemas.auth import (
     ForgetPasswordRequest,
     ResetPasswordRequest,
     ActivateRequest,
+    RefreshTokenRequest,
     Token,
+    TokenUser,
     SignUpResponse,
     ForgetPasswordResponse,
     VerifyCodeResponse,
 )
 import random
+import hashlib
+import secrets
+import uuid
 from app.core.settings import settings
 
 router = APIRouter(tags=["auth"], prefix="/auth")
@@ -37,40 +46,41 @@ router = APIRouter(tags=["auth"], prefix="/auth")
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
-# password hashing and unhashing
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS
 # auth is this file while token is the endpoint of API
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl="auth/token")
+# resolved users keyed by token subject (email), saves one users query per request
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
 
 # we use this request to validate before submitting it to DB as a new user
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 
 # new user register
 @router.post("/signup", response_model=SignUpResponse)
-async def register(
-    user: SignUpRequest, background_tasks: BackgroundTasks, db: db_dependency
-):
+async def register(user: SignUpRequest, db: db_dependency):
     # check if the user already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await db.scalar(select(User).filter(User.email == user.email))
     if db_user is not None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Email already registered"
         )
 
-    db_company = db.query(Company).filter(Company.name == user.company).first()
+    db_company = await db.scalar(select(Company).filter(Company.name == user.company))
     if db_company is not None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Company already exists"
         )
     new_company = Company(name=user.company)
     db.add(new_company)
-    db.commit()
-    db.refresh(new_company)
+    await db.commit()
+    await db.refresh(new_company)
 
     # encrypt the password
-    hashed_password = bcrypt_context.hash(user.password)
+    hashed_password = await hash_password(user.password)
     new_user = User(
         email=user.email,
         password=hashed_password,
@@ -80,8 +90,6 @@ async def register(
         is_active=False,
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
 
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     token_data = {"sub": user.email, "exp": expire}
@@ -92,14 +100,16 @@ async def register(
         f"{settings.FRONTEND_URL}/activate-account?token={activation_token}"
     )
 
-    # send email with activation link to the user
-    background_tasks.add_task(
-        send_email,
+    # queue email with activation link to the user, committed with the new user
+    queue_email(
+        db,
         email_to=user.email,
         subject="Activate your account",
         template_name="activate_account",
         data={"activation_link": activation_link},
     )
+    await db.commit()
+    await db.refresh(new_user)
     # print(f"sender email: {settings.MAIL_FROM}")
     # print(f"sender email: {settings.MAIL_USERNAME}")
     # print(f"sender email: {settings.MAIL_PORT}")
@@ -115,11 +125,9 @@ async def register(
 
 # forget password
 @router.post("/forget-password", response_model=ForgetPasswordResponse)
-async def forget_password(
-    user: ForgetPasswordRequest, background_tasks: BackgroundTasks, db: db_dependency
-):
+async def forget_password(user: ForgetPasswordRequest, db: db_dependency):
     # check if the user already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await db.scalar(select(User).filter(User.email == user.email))
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Email not found"
@@ -128,17 +136,17 @@ async def forget_password(
     db_user.verification_code = verification_code
     db_user.expires_at = datetime.utcnow() + timedelta(minutes=5)  # 5 minutes to verify
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
 
-    # send email with verification code to the user
-    background_tasks.add_task(
-        send_email,
+    # queue email with verification code to the user
+    queue_email(
+        db,
         email_to=user.email,
         subject="Verify your email",
         template_name="verification_code",
         data={"verification_code": verification_code},
     )
+    await db.commit()
+    await db.refresh(db_user)
     return ForgetPasswordResponse(email=db_user.email, expires_at=db_user.expires_at)
 
 
@@ -146,7 +154,7 @@ async def forget_password(
 @router.post("/verify-code", response_model=VerifyCodeResponse)
 async def verify_code(code: str, db: db_dependency):
     print(code)
-    db_user = db.query(User).filter(User.verification_code == code).first()
+    db_user = await db.scalar(select(User).filter(User.verification_code == code))
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Invalid verification code"
@@ -166,15 +174,20 @@ async def verify_code(code: str, db: db_dependency):
 # reset password
 @router.post("/reset-password", response_model=ResetPasswordResponse)
 async def reset_password(user: ResetPasswordRequest, db: db_dependency):
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await db.scalar(select(User).filter(User.email == user.email))
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Email not found"
         )
-    db_user.password = bcrypt_context.hash(user.password)
+    db_user.password = await hash_password(user.password)
+    # tokens issued with the old password stop working
+    db_user.tokens_valid_after = datetime.now(timezone.utc)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await revoke_refresh_tokens(db_user.id, db)
+    await db.commit()
+    await db.refresh(db_user)
+    invalidate_principal(db_user.email)
+    revoke_user_tokens(db_user.id)
     return ResetPasswordResponse(
         email=db_user.email, password_reset_status="successful"
     )
@@ -182,10 +195,8 @@ async def reset_password(user: ResetPasswordRequest, db: db_dependency):
 
 # send activate email
 #@router.post("/send-activate-email", response_model=ActivateEmailResponse)
-async def send_activate_email(
-    email: str, background_tasks: BackgroundTasks, db: db_dependency
-):
-    db_user = db.query(User).filter(User.email == email).first()
+async def send_activate_email(email: str, db: db_dependency):
+    db_user = await db.scalar(select(User).filter(User.email == email))
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Email not found"
@@ -204,14 +215,15 @@ async def send_activate_email(
         f"{settings.FRONTEND_URL}/activate-account?token={activation_token}"
     )
 
-    # send email with activation link to the user
-    background_tasks.add_task(
-        send_email,
+    # queue email with activation link to the user
+    queue_email(
+        db,
         email_to=email,
         subject="Activate your account",
         template_name="activate_account",
         data={"activation_link": activation_link},
     )
+    await db.commit()
 
     return ActivateEmailResponse(
         email=email, status="success", message="Activation email sent successfully"
@@ -229,7 +241,7 @@ async def activate_account(req: ActivateRequest, db: db_dependency):
             status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token"
         )
 
-    db_user = db.query(User).filter(User.email == email).first()
+    db_user = await db.scalar(select(User).filter(User.email == email))
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
@@ -240,7 +252,8 @@ async def activate_account(req: ActivateRequest, db: db_dependency):
 
     # activate the account
     db_user.is_active = True
-    db.commit()
+    await db.commit()
+    invalidate_principal(email)
     return {"message": "Account activated successfully"}
 
 
@@ -250,7 +263,7 @@ async def activate_account(req: ActivateRequest, db: db_dependency):
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: db_dependency
 ):
-    user = authenticate_user(form_data.username, form_data.password, db)
+    user = await authenticate_user(form_data.username, form_data.password, db)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate user"
@@ -264,90 +277,202 @@ async def login_for_access_token(
 
     # if there is a valid user, create a token
     token = create_access_token(
-        form_data.username, timedelta(minutes=int(ACCESS_TOKEN_EXPIRE_MINUTES))
+        user, timedelta(minutes=int(ACCESS_TOKEN_EXPIRE_MINUTES))
     )
+    refresh_token = issue_refresh_token(user.id, db)
+    await db.commit()
     return {
         "access_token": token,
         "token_type": "bearer",
         "type": "admin" if user.is_admin else "contractor",
+        "refresh_token": refresh_token,
+    }
+
+
+# exchange a refresh token for a new access token without re-checking the password
+# the refresh token is rotated on every use, presenting a rotated one revokes its whole family
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(req: RefreshTokenRequest, db: db_dependency):
+    now = datetime.now(timezone.utc)
+    db_token = await db.scalar(
+        select(RefreshToken).filter(
+            RefreshToken.token_hash == hash_refresh_token(req.refresh_token),
+            RefreshToken.expires_at > now,
+        )
+    )
+    if db_token is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+        )
+
+    # mark it used, the revoked_at check keeps two concurrent refreshes from both winning
+    result = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == db_token.id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+    )
+    if result.rowcount != 1:
+        # the token was already rotated, assume it leaked and end the session
+        await db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.family_id == db_token.family_id,
+                RefreshToken.revoked_at.is_(None),
+            )
+            .values(revoked_at=now)
+        )
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token reuse detected",
+        )
+
+    user = await db.scalar(select(User).filter(User.id == db_token.user_id))
+    if user is None or not user.is_active:
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="User is not active"
+        )
+
+    token = create_access_token(
+        user, timedelta(minutes=int(ACCESS_TOKEN_EXPIRE_MINUTES))
+    )
+    refresh_token = issue_refresh_token(user.id, db, family_id=db_token.family_id)
+    await db.commit()
+    return {
+        "access_token": token,
+        "token_type": "bearer",
+        "type": "admin" if user.is_admin else "contractor",
+        "refresh_token": refresh_token,
     }
 
 
 # check whether the user is authenticated
-def authenticate_user(email: str, password: str, db):
+async def authenticate_user(email: str, password: str, db):
     #  check if the user exists
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).filter(User.email == email))
     if not user:
         return False
     # check if the password matches the hashed password in the database
-    if not bcrypt_context.verify(password, user.password):
+    if not await verify_password(password, user.password):
         return False
 
     return user
 
 
 # create a JWT token
-def create_access_token(email: str, expires_delta: timedelta):
-    expire = datetime.utcnow() + expires_delta
-    encode = {"sub": email, "exp": expire}
+# the claims carry everything get_current_admin needs, so it never has to query users
+def create_access_token(user: User, expires_delta: timedelta):
+    issued_at = datetime.now(timezone.utc)
+    expire = issued_at + expires_delta
+    encode = {
+        "sub": user.email,
+        "uid": user.id,
+        "company_id": user.company_id,
+        "is_admin": user.is_admin,
+        "role": user.role.name,
+        "iat": issued_at,
+        "exp": expire,
+    }
     # print(f"Token will expire at: {expire}")
     return jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-# decode JWT to get the current user
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_bearer)], db: db_dependency
-):
+def hash_refresh_token(refresh_token: str) -> str:
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+
+# add a refresh token row to the session and return the raw token, the caller commits
+def issue_refresh_token(user_id: int, db, family_id: str = None) -> str:
+    refresh_token = secrets.token_urlsafe(48)
+    db.add(
+        RefreshToken(
+            user_id=user_id,
+            token_hash=hash_refresh_token(refresh_token),
+            family_id=family_id or uuid.uuid4().hex,
+            expires_at=datetime.now(timezone.utc)
+            + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+    )
+    return refresh_token
+
+
+# revoke every outstanding refresh token of a user, the caller commits
+async def revoke_refresh_tokens(user_id: int, db):
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+    )
+
+
+# decode JWT claims and reject tokens that were revoked
+def decode_access_token(token: str) -> TokenUser:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        print(payload)
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate user-email",
-            )
-        user = db.query(User).filter(User.email == email).first()
-        if user is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
-            )
-        return user
     except JWTError:
         # print(f"JWT error{e}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate user-payload",
         )
+    # activation tokens and tokens from before claims were added only carry sub
+    if payload.get("sub") is None or payload.get("uid") is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate user-email",
+        )
+    if is_token_revoked(payload["uid"], payload.get("iat", 0)):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked"
+        )
+    return TokenUser(
+        id=payload["uid"],
+        email=payload["sub"],
+        company_id=payload["company_id"],
+        is_admin=payload["is_admin"],
+        role=payload["role"],
+    )
 
 
-# get the current user and check if the user is an admin
-async def get_current_admin(
+# look up the user for a token subject, served from principal_cache when possible
+async def get_principal(email: str, db):
+    user = principal_cache.get(email)
+    if user is None:
+        user = await db.scalar(select(User).filter(User.email == email))
+        if user is not None:
+            # detach it so the cached copy is not tied to this request's session
+            db.expunge(user)
+            principal_cache.set(email, user)
+    return user
+
+
+# must be called whenever a user's row changes so stale principals are not served
+def invalidate_principal(email: str):
+    principal_cache.invalidate(email)
+
+
+# decode JWT to get the current user
+async def get_current_user(
     token: Annotated[str, Depends(oauth2_bearer)], db: db_dependency
 ):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        print(payload)
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate user-email",
-            )
-        user = db.query(User).filter(User.email == email).first()
-        if user is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
-            )
-        if not user.is_admin:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User is not an administrator",
-            )
-        return user
-    except JWTError:
-        # print(f"JWT error{e}")
+    principal = decode_access_token(token)
+    user = await get_principal(principal.email, db)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+        )
+    return user
+
+
+# get the current user and check if the user is an admin
+# authorized from the token claims alone, deactivation is enforced by the revocation table
+async def get_current_admin(token: Annotated[str, Depends(oauth2_bearer)]):
+    principal = decode_access_token(token)
+    if not principal.is_admin:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate user-payload",
+            detail="User is not an administrator",
         )
+    return principal
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from typing import Annotated, Literal
+from app.core.export import EXPORT_MEDIA_TYPES, stream_export
+from app.core.readonly import select_schema
+from app.models.project import Project
+from app.models.project_task import ProjectTask
+from app.models.user import User
+from app.routes.auth import get_current_admin
+from app.schemas.project import ProjectBase
+from app.schemas.project_task import ProjectTaskDetail
+
+router = APIRouter(tags=["export"], prefix="/export")
+
+
+# every project of the company, streamed in id order
+@router.post("/projects", response_class=StreamingResponse)
+async def export_projects(
+    current_user: Annotated[User, Depends(get_current_admin)],
+    format: Literal["ndjson", "json"] = "ndjson",
+):
+    query = (
+        select_schema(Project, ProjectBase)
+        .filter(Project.company_id == current_user.company_id)
+        .order_by(Project.id)
+    )
+    return StreamingResponse(
+        stream_export(query, ProjectBase, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+    )
+
+
+# every task of every project of the company, streamed by project
+@router.post("/project-tasks", response_class=StreamingResponse)
+async def export_project_tasks(
+    current_user: Annotated[User, Depends(get_current_admin)],
+    format: Literal["ndjson", "json"] = "ndjson",
+):
+    query = (
+        select_schema(ProjectTask, ProjectTaskDetail)
+        .join(Project, Project.id == ProjectTask.project_id)
+        .filter(Project.company_id == current_user.company_id)
+        .order_by(ProjectTask.project_id, ProjectTask.task_id)
+    )
+    return StreamingResponse(
+        stream_export(query, ProjectTaskDetail, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+    )
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+from typing import Annotated
+from app.core.hashing import get_hash_metrics
+from app.core.schedule import graph_cache, schedule_cache
+from app.core.task_catalog import catalog_cache
+from app.core.token_revocation import get_revocation_metrics
+from app.models.user import User
+from app.routes.auth import get_current_admin, principal_cache
+
+router = APIRouter(tags=["metrics"], prefix="/metrics")
+
+
+# in-process counters for this worker
+@router.get("/")
+async def get_metrics(current_user: Annotated[User, Depends(get_current_admin)]):
+    return {
+        "password_hashing": get_hash_metrics(),
+        "principal_cache": principal_cache.stats(),
+        "token_revocation": get_revocation_metrics(),
+        "schedule_cache": schedule_cache.stats(),
+        "what_if_graph_cache": graph_cache.stats(),
+        "task_catalog_cache": catalog_cache.stats(),
+    }
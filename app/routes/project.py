@@ -1,85 +1,209 @@
+from collections import Counter, defaultdict
 from datetime import timedelta
-from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks
-from typing import Annotated, List
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from fastapi import (
+    APIRouter,
+    Body,
+    HTTPException,
+    Depends,
+    Header,
+    Query,
+    Response,
+    status,
+)
+from typing import Annotated, List, Optional
+from sqlalchemy import func, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.notification import Notification
 from app.models.project import Project
 from app.models.user import User
 from app.models.task import Task
 from app.models.project_task import ProjectTask
-from app.database import get_db
+from app.database import get_async_db
 from app.routes.auth import get_current_admin, get_current_user
 from app.schemas.notification import NotificationCreate
+from app.schemas.pagination import Page
+from app.schemas.schedule import (
+    ProjectSchedule,
+    ScheduledTask,
+    WhatIfRequest,
+    WhatIfSchedule,
+)
 from app.schemas.project import ProjectBase, ProjectCreate, ProjectUpdate
 from app.schemas.project_task import (
+    BulkTaskUpdateError,
+    BulkTaskUpdateResponse,
     ProjectTaskBase,
     ProjectTaskCreate,
+    ProjectTaskDetail,
     ProjectTaskUpdate,
+    ProjectTaskUpdateResponse,
+    TaskDateShift,
     TaskWithProjectTask,
     ProjectWithTasks,
 )
 from app.schemas.task import TaskCreate, TaskBase
 from starlette import status
 from app.models.project import ProjectPriority, ProjectStatus
-from app.models.project_task import TaskStatus
+from app.models.project_task import (
+    STATUS_COUNT_COLUMNS,
+    TaskStatus,
+    project_rollup_update,
+)
 from app.models.project_tracking import ProjectTracking
-from app.core.email import send_email
+from app.core.email import queue_email
+from app.core.etag import etag_matches, not_modified, set_etag, weak_etag
+from app.core.geo import get_geo_data
+from app.core.pagination import keyset_page
+from app.core.readonly import schema_bundle, select_schema
+from app.core.serialization import json_response, type_adapter
+from app.core.schedule import (
+    Schedule,
+    ScheduleCycleError,
+    date_shift,
+    get_schedule,
+    get_task_graph,
+    graph_cache,
+    schedule_cache,
+    shift_dependents,
+    shift_dependents_of_tasks,
+)
+from app.core.sql_metrics import query_budget
 
 router = APIRouter(tags=["projects"], prefix="/projects")
-db_dependence = Annotated[Session, Depends(get_db)]
+db_dependence = Annotated[AsyncSession, Depends(get_async_db)]
 
 
-# contractor project list
-@router.post("/contractor", response_model=List[ProjectTaskBase])
+# contractor project list, one page of projects with only this contractor's tasks
+# two queries whatever the page size: the page of projects, then their assigned tasks
+@router.post(
+    "/contractor",
+    response_model=Page[ProjectWithTasks],
+    dependencies=[query_budget(3)],
+)
 async def get_contractor_projects(
-    db: db_dependence, current_user: Annotated[User, Depends(get_current_user)]
+    db: db_dependence,
+    current_user: Annotated[User, Depends(get_current_user)],
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
 ):
-    db_projects = (
-        db.query(Project)
-        .join(ProjectTask, ProjectTask.project_id == Project.id)
-        .filter(ProjectTask.assignee_id == current_user.id)
-        .all()
+    assigned = select(ProjectTask.project_id).filter(
+        ProjectTask.assignee_id == current_user.id
     )
-    result = []
-    for project in db_projects:
-        # get project tasks
-        tasks = (
-            db.query(Task)
-            .join(ProjectTask, ProjectTask.task_id == Task.id)
-            .filter(ProjectTask.project_id == project.id)
-            .all()
-        )
-        project_data = ProjectTaskBase(
-            project=project,
-            tasks=tasks,
+    db_projects, next_cursor, _ = await keyset_page(
+        db,
+        select_schema(Project, ProjectBase).filter(Project.id.in_(assigned)),
+        [Project.id],
+        limit,
+        cursor,
+    )
+
+    rows = []
+    if db_projects:
+        rows = (
+            await db.execute(
+                select(
+                    schema_bundle("task", Task, TaskBase),
+                    schema_bundle("project_task", ProjectTask, ProjectTaskDetail),
+                )
+                .select_from(Task)
+                .join(ProjectTask, ProjectTask.task_id == Task.id)
+                .filter(
+                    ProjectTask.assignee_id == current_user.id,
+                    ProjectTask.project_id.in_([p["id"] for p in db_projects]),
+                )
+                .order_by(ProjectTask.project_id, Task.sort_order, Task.id)
+            )
+        ).all()
+    tasks_by_project = defaultdict(list)
+    for row in rows:
+        tasks_by_project[row.project_task.project_id].append(
+            {
+                "task": dict(row.task._mapping),
+                "project_task": dict(row.project_task._mapping),
+            }
         )
-        result.append(project_data)
-    # print("result:", result)
-    return result
+
+    return json_response(
+        Page[ProjectWithTasks],
+        {
+            "items": [
+                {"project": project, "tasks": tasks_by_project[project["id"]]}
+                for project in db_projects
+            ],
+            "next_cursor": next_cursor,
+        },
+    )
 
 
-@router.post("/all", response_model=List[ProjectBase])
+# company project list, one page at a time, optionally filtered
+@router.post("/all", response_model=Page[ProjectBase], dependencies=[query_budget(2)])
 async def get_all_projects(
-    db: db_dependence, current_user: Annotated[User, Depends(get_current_admin)]
+    db: db_dependence,
+    current_user: Annotated[User, Depends(get_current_admin)],
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    project_status: Optional[ProjectStatus] = Query(None, alias="status"),
+    priority: Optional[ProjectPriority] = None,
+    city_id: Optional[int] = None,
+    assignee_id: Optional[int] = None,
 ):
-    db_projects = (
-        db.query(Project).filter(Project.company_id == current_user.company_id).all()
+    query = select_schema(Project, ProjectBase).filter(
+        Project.company_id == current_user.company_id
+    )
+    if project_status is not None:
+        query = query.filter(Project.status == project_status)
+    if priority is not None:
+        query = query.filter(Project.priority == priority)
+    if city_id is not None:
+        query = query.filter(Project.city_id == city_id)
+    if assignee_id is not None:
+        query = query.filter(Project.current_assignee == assignee_id)
+    db_projects, next_cursor, total = await keyset_page(
+        db, query, [Project.id], limit, cursor, include_total
     )
-    return [ProjectBase.model_validate(project) for project in db_projects]
+    return json_response(
+        Page[ProjectBase],
+        {"items": db_projects, "next_cursor": next_cursor, "total": total},
+    )
+
+
+# weak ETag of the project detail, None when the project is not in the company
+# Project.version moves with every edit to the project or one of its tasks, so the check
+# is a primary key lookup, timestamps alone miss edits made within the same second
+async def project_detail_etag(
+    db: AsyncSession, id: int, company_id: int
+) -> Optional[str]:
+    version = await db.scalar(
+        select(Project.version).filter(
+            Project.id == id, Project.company_id == company_id
+        )
+    )
+    return None if version is None else weak_etag("project", id, version)
 
 
 # projectTask detail: project detail, task list, gantt chart
-@router.post("/{id}", response_model=ProjectWithTasks)
+# send the ETag back in If-None-Match to get a 304 without the body while nothing changed
+@router.post("/{id}", response_model=ProjectWithTasks, dependencies=[query_budget(3)])
 async def get_project_detail(
     id: int,
     db: db_dependence,
     current_user: Annotated[User, Depends(get_current_admin)],
+    response: Response,
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ):
-    db_project = (
-        db.query(Project)
-        .filter(Project.id == id, Project.company_id == current_user.company_id)
-        .first()
+    etag = await project_detail_etag(db, id, current_user.company_id)
+    if etag is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Project does not exist"
+        )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    db_project = await db.scalar(
+        select(Project).filter(
+            Project.id == id, Project.company_id == current_user.company_id
+        )
     )
 
     if db_project is None:
@@ -87,29 +211,20 @@ async def get_project_detail(
             status_code=status.HTTP_404_NOT_FOUND, detail="Project does not exist"
         )
 
-    # Calculate the total budget of the project, it is actual budget of the project
-    actual_budget = (
-        db.query(func.sum(ProjectTask.budget))
-        .filter(ProjectTask.project_id == id)
-        .scalar()
-    ) or 0  # if there is no budget, set it to 0
-
     tasks_with_project_tasks = (
-        db.query(Task, ProjectTask)
-        .join(ProjectTask, ProjectTask.task_id == Task.id)
-        .filter(ProjectTask.project_id == id)
-        .all()
-    )
+        await db.execute(
+            select(Task, ProjectTask)
+            .join(ProjectTask, ProjectTask.task_id == Task.id)
+            .filter(ProjectTask.project_id == id)
+        )
+    ).all()
     tasks = [
         TaskWithProjectTask(task=task, project_task=project_task)
         for task, project_task in tasks_with_project_tasks
     ]
 
-    db_project.actual_budget = actual_budget
-
-    response = ProjectWithTasks(project=db_project, tasks=tasks)
-
-    return response
+    set_etag(response, etag)
+    return ProjectWithTasks(project=db_project, tasks=tasks)
 
 
 # Create PROJECT, PROJECT_TASK
@@ -120,8 +235,11 @@ async def create_project(
     current_user: Annotated[User, Depends(get_current_admin)],
 ):
 
+    # city and province must exist and match, checked against the in-memory reference data
+    (await get_geo_data()).check_location(project.city_id, project.province_id)
+
     # check project existence
-    db_project = db.query(Project).filter(Project.name == project.name).first()
+    db_project = await db.scalar(select(Project).filter(Project.name == project.name))
 
     if db_project is not None:
         raise HTTPException(
@@ -138,10 +256,10 @@ async def create_project(
     # add project into Project table
     try:
         db.add(new_project)
-        db.commit()
-        db.refresh(new_project)
+        await db.commit()
+        await db.refresh(new_project)
     except Exception as e:
-        db.rollback()  # rollback the transaction
+        await db.rollback()  # rollback the transaction
         print("Database Commit Error:", str(e))
         raise HTTPException(status_code=500, detail="Database commit failed")
 
@@ -163,7 +281,7 @@ async def create_project(
             for task_id in project.task_ids
         ]
         db.add_all(project_tasks)
-        db.commit()
+        await db.commit()
 
     return new_project
 
@@ -176,7 +294,7 @@ async def update_project(
     db: db_dependence,
     current_user: Annotated[User, Depends(get_current_admin)],
 ):
-    db_project = db.query(Project).filter(Project.id == id).first()
+    db_project = await db.scalar(select(Project).filter(Project.id == id))
     if db_project is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Project does not exist."
@@ -184,13 +302,18 @@ async def update_project(
     print(project.model_dump())
     # Get only provided fields
     update_data = project.model_dump(exclude_unset=True)
+    if "city_id" in update_data or "province_id" in update_data:
+        (await get_geo_data()).check_location(
+            update_data.get("city_id") or db_project.city_id,
+            update_data.get("province_id") or db_project.province_id,
+        )
 
     # Update the project fields
     for key, value in update_data.items():
         setattr(db_project, key, value)
 
-    db.commit()
-    db.refresh(db_project)
+    await db.commit()
+    await db.refresh(db_project)
     return db_project
 
 
@@ -202,26 +325,28 @@ async def delete_project(
     current_user: Annotated[User, Depends(get_current_admin)],
 ):
 
-    db_project = db.query(Project).filter(Project.id == id).first()
+    db_project = await db.scalar(select(Project).filter(Project.id == id))
     if db_project is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Project does not exist."
         )
     # delete project tasks
-    db_project_tasks = db.query(ProjectTask).filter(ProjectTask.project_id == id).all()
+    db_project_tasks = (
+        await db.scalars(select(ProjectTask).filter(ProjectTask.project_id == id))
+    ).all()
     for project_task in db_project_tasks:
-        db.delete(project_task)
+        await db.delete(project_task)
 
     # delete project notifications
     db_notifications = (
-        db.query(Notification).filter(Notification.project_id == id).all()
-    )
+        await db.scalars(select(Notification).filter(Notification.project_id == id))
+    ).all()
     for notification in db_notifications:
-        db.delete(notification)
+        await db.delete(notification)
 
     # delete project
-    db.delete(db_project)
-    db.commit()
+    await db.delete(db_project)
+    await db.commit()
 
 
 # create TASK, PROEJCT_TASK(DEPENDENCY)
@@ -233,14 +358,14 @@ async def add_task(
     current_user: Annotated[User, Depends(get_current_admin)],
 ):
     # Check if the project exists
-    db_project = db.query(Project).filter(Project.id == id).first()
+    db_project = await db.scalar(select(Project).filter(Project.id == id))
     if db_project is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Project does not exist"
         )
     print("task:", task.model_dump())
     # check the existence of the task
-    db_task = db.query(Task).filter(Task.name == task.name).first()
+    db_task = await db.scalar(select(Task).filter(Task.name == task.name))
     if db_task is None:
         # add new task to TASK table
         new_task = Task(
@@ -250,7 +375,7 @@ async def add_task(
             sort_order=task.sort_order,
         )
         db.add(new_task)
-        db.flush()
+        await db.flush()
 
         new_project_task = ProjectTask(
             project_id=id,
@@ -261,10 +386,10 @@ async def add_task(
         )
         db.add(new_project_task)
     else:
-        existing_link = (
-            db.query(ProjectTask)
-            .filter(ProjectTask.project_id == id, ProjectTask.task_id == db_task.id)
-            .first()
+        existing_link = await db.scalar(
+            select(ProjectTask).filter(
+                ProjectTask.project_id == id, ProjectTask.task_id == db_task.id
+            )
         )
         if existing_link:
             raise HTTPException(
@@ -280,12 +405,14 @@ async def add_task(
             amount_due=0.0,
         )
         db.add(project_task)
-    db.commit()
+    await db.commit()
 
-    db.refresh(db_project)
+    await db.refresh(db_project)
     db_tasks = (
-        db.query(Task).join(ProjectTask).filter(ProjectTask.project_id == id).all()
-    )
+        await db.scalars(
+            select(Task).join(ProjectTask).filter(ProjectTask.project_id == id)
+        )
+    ).all()
 
     response = ProjectTaskBase(project=db_project, tasks=db_tasks)
     return response
@@ -297,23 +424,34 @@ async def get_project_tasks(
     task_id: int,
     db: db_dependence,
     current_user: Annotated[User, Depends(get_current_admin)],
+    response: Response,
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ):
-    db_task = (
-        db.query(ProjectTask)
-        .filter(ProjectTask.project_id == id, ProjectTask.task_id == task_id)
-        .first()
-    )
-    if db_task is None:
+    row = (
+        await db.execute(
+            select(ProjectTask, Project.version)
+            .join(Project, Project.id == ProjectTask.project_id)
+            .filter(ProjectTask.project_id == id, ProjectTask.task_id == task_id)
+        )
+    ).one_or_none()
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Project task does not exist"
         )
+    db_task, version = row
+    # the project version moves with any change to the task
+    etag = weak_etag("project-task", id, task_id, version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
 
+    set_etag(response, etag)
     return db_task
 
 
 # PROJECT_TASK
 @router.put(
     "/{id}/tasks",
+    response_model=ProjectTaskUpdateResponse,
 )
 async def update_task(
     id: int,
@@ -322,19 +460,17 @@ async def update_task(
     current_user: Annotated[User, Depends(get_current_admin)],
 ):
     # check if the project exists
-    db_project = db.query(Project).filter(Project.id == id).first()
+    db_project = await db.scalar(select(Project).filter(Project.id == id))
     if db_project is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Project does not exist."
         )
 
     # check if the project task exists
-    db_project_task = (
-        db.query(ProjectTask)
-        .filter(
+    db_project_task = await db.scalar(
+        select(ProjectTask).filter(
             ProjectTask.task_id == task_update.task_id, ProjectTask.project_id == id
         )
-        .first()
     )
     if db_project_task is None:
         raise HTTPException(
@@ -348,41 +484,196 @@ async def update_task(
 
     print("db_project:", id)
     print("task_update:", task_update.model_dump())
+    previous_end_date = db_project_task.end_date
     # update project task
     update_data = task_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_project_task, key, value)
 
-    db.commit()
-    db.refresh(db_project_task)
+    # flushing updates the project's task counters (see app/models/project_task.py)
+    await db.flush()
+
+    # tasks waiting on this one move with its end date
+    shifted_tasks = await shift_dependents(
+        db,
+        id,
+        db_project_task.task_id,
+        date_shift(previous_end_date, task_update.end_date),
+    )
 
     # update project status if task.status is updated
     if "status" in update_data:
-        all_tasks = db.query(ProjectTask).filter(ProjectTask.project_id == id).all()
         project_status = determine_project_status(
-            all_tasks
+            await task_status_counts(db, db_project)
         )  # Function to get project status
         print("project_status:", project_status)
         # update project status
         if project_status != db_project.status:
             db_project.status = project_status
-            db.commit()
-            db.refresh(db_project)
 
-    return db_project_task
+    await db.commit()
+    await db.refresh(db_project_task)
+
+    response = ProjectTaskUpdateResponse.model_validate(db_project_task)
+    response.shifted_tasks = [TaskDateShift(**shift) for shift in shifted_tasks]
+    return response
+
 
+# PROJECT_TASK (many), for Gantt chart edits
+# all valid patches are written in one transaction with a single executemany UPDATE,
+# patches that can't be applied are reported in errors and the rest still go through
+# tasks waiting on a task whose end date moved are shifted like in update_task
+@router.put(
+    "/{id}/tasks/bulk",
+    response_model=BulkTaskUpdateResponse,
+    dependencies=[query_budget(10)],
+)
+async def bulk_update_tasks(
+    id: int,
+    task_updates: Annotated[List[ProjectTaskUpdate], Body(max_length=500)],
+    db: db_dependence,
+    current_user: Annotated[User, Depends(get_current_admin)],
+):
+    db_project = await db.scalar(
+        select(Project).filter(
+            Project.id == id, Project.company_id == current_user.company_id
+        )
+    )
+    if db_project is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Project does not exist."
+        )
 
-def determine_project_status(tasks):
+    # current values of the patched tasks, used for the existence check and rollup deltas
+    task_ids = {task_update.task_id for task_update in task_updates}
+    existing = {
+        row.task_id: row
+        for row in await db.execute(
+            select(
+                ProjectTask.task_id,
+                ProjectTask.status,
+                ProjectTask.budget,
+                ProjectTask.amount_due,
+                ProjectTask.end_date,
+            ).filter(ProjectTask.project_id == id, ProjectTask.task_id.in_(task_ids))
+        )
+    }
+
+    errors = []
+    rows = []
+    seen = set()
+    budget = amount_due = 0
+    statuses = Counter()
+    # task id -> how far its end date moved, for every task the patches date
+    date_shifts = {}
+    for index, task_update in enumerate(task_updates):
+        update_data = task_update.model_dump(exclude_unset=True, exclude={"task_id"})
+        current = existing.get(task_update.task_id)
+        if current is None:
+            detail = "Project task does not exist."
+        elif task_update.task_id in seen:
+            detail = "Task is updated more than once in this request."
+        else:
+            detail = next(
+                (
+                    f"{key} cannot be null."
+                    for key in ("status", "budget", "amount_due")
+                    if key in update_data and update_data[key] is None
+                ),
+                None,
+            )
+        if detail:
+            errors.append(
+                BulkTaskUpdateError(
+                    index=index, task_id=task_update.task_id, detail=detail
+                )
+            )
+            continue
+        seen.add(task_update.task_id)
+        if not update_data:
+            continue
+
+        rows.append({"project_id": id, "task_id": task_update.task_id, **update_data})
+        if "budget" in update_data:
+            budget += update_data["budget"] - current.budget
+        if "amount_due" in update_data:
+            amount_due += update_data["amount_due"] - current.amount_due
+        if "status" in update_data:
+            statuses[current.status] -= 1
+            statuses[update_data["status"]] += 1
+        if "start_date" in update_data or "end_date" in update_data:
+            date_shifts[task_update.task_id] = date_shift(
+                current.end_date, update_data.get("end_date", current.end_date)
+            )
+
+    if rows:
+        # bulk UPDATE by primary key, executemany skips the ProjectTask rollup events
+        await db.execute(update(ProjectTask), rows)
+        rollup = project_rollup_update(id, budget, amount_due, statuses)
+        await db.execute(rollup.execution_options(synchronize_session="fetch"))
+        # nor the cache invalidation, other workers notice the new Project.version
+        # (schedules) or let their short-lived what-if graph expire
+        schedule_cache.invalidate(id)
+        graph_cache.invalidate(id)
+    shifted_tasks = await shift_dependents_of_tasks(db, id, date_shifts)
+
+    # recompute project status once for the whole batch
+    if any("status" in row for row in rows):
+        project_status = determine_project_status(
+            await task_status_counts(db, db_project)
+        )
+        if project_status != db_project.status:
+            db_project.status = project_status
+
+    await db.commit()
+
+    updated = []
+    if seen:
+        updated = (
+            await db.scalars(
+                select(ProjectTask)
+                .filter(ProjectTask.project_id == id, ProjectTask.task_id.in_(seen))
+                .order_by(ProjectTask.task_id)
+                .execution_options(populate_existing=True)
+            )
+        ).all()
+
+    return BulkTaskUpdateResponse(
+        project_status=db_project.status,
+        updated=updated,
+        errors=errors,
+        shifted_tasks=shifted_tasks,
+    )
+
+
+# number of the project's tasks in each status
+# read from the counters kept on the project, one grouped COUNT if they are not loaded
+async def task_status_counts(db: AsyncSession, project: Project) -> dict:
+    loaded = inspect(project).dict
+    counts = {
+        task_status: loaded.get(column.key)
+        for task_status, column in STATUS_COUNT_COLUMNS.items()
+    }
+    if None not in counts.values():
+        return counts
+    rows = await db.execute(
+        select(ProjectTask.status, func.count())
+        .filter(ProjectTask.project_id == project.id)
+        .group_by(ProjectTask.status)
+    )
+    return {**dict.fromkeys(STATUS_COUNT_COLUMNS, 0), **dict(rows.all())}
+
+
+def determine_project_status(status_counts: dict):
     """
-    Determines project status based on all task statuses.
+    Determines project status from the number of tasks in each status.
     Example rules:
     - If all tasks are "completed", project is "completed".
     - If any task is "in progress", project is "in progress".
     - If all tasks are "pending", project is "pending".
     """
 
-    statuses = {task.status for task in tasks}
-    print("statuses:", statuses)
+    statuses = {task_status for task_status, count in status_counts.items() if count}
 
     if TaskStatus.COMPLETED in statuses and len(statuses) == 1:
         return ProjectStatus.COMPLETED
@@ -411,6 +702,138 @@ def determine_project_status(tasks):
     return ProjectStatus.IN_PROGRESS  # Default case
 
 
+# earliest/latest dates, float and critical path from the task dependencies and durations
+@router.post(
+    "/{id}/schedule",
+    response_model=ProjectSchedule,
+    dependencies=[query_budget(3)],
+)
+async def get_project_schedule(
+    id: int,
+    db: db_dependence,
+    current_user: Annotated[User, Depends(get_current_admin)],
+):
+    db_project = await db.scalar(
+        select(Project).filter(
+            Project.id == id, Project.company_id == current_user.company_id
+        )
+    )
+    if db_project is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Project does not exist."
+        )
+    try:
+        schedule = await get_schedule(db, id)
+    except ScheduleCycleError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    # the JSON body is kept with the cached schedule until the tasks or start date change
+    start = db_project.start_date
+    if schedule.response is None or schedule.response[0] != start:
+        body = type_adapter(ProjectSchedule).dump_json(
+            schedule_response(db_project, schedule)
+        )
+        schedule.response = (start, body)
+    return Response(schedule.response[1], media_type="application/json")
+
+
+# simulate changes to tasks ("what if task X slips 5 days") without writing anything
+# the task graph comes from a short-lived cache, so repeated simulations don't reload it
+@router.post(
+    "/{id}/schedule/what-if",
+    response_model=WhatIfSchedule,
+    dependencies=[query_budget(2)],
+)
+async def simulate_project_schedule(
+    id: int,
+    what_if: WhatIfRequest,
+    db: db_dependence,
+    current_user: Annotated[User, Depends(get_current_admin)],
+):
+    db_project = await db.scalar(
+        select(Project).filter(
+            Project.id == id, Project.company_id == current_user.company_id
+        )
+    )
+    if db_project is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Project does not exist."
+        )
+    try:
+        graph = await get_task_graph(db, id)
+    except ScheduleCycleError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    unknown = [c.task_id for c in what_if.changes if c.task_id not in graph.index]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Project task does not exist: {unknown}",
+        )
+    durations = list(graph.durations)
+    delays = [0] * len(durations)
+    for change in what_if.changes:
+        i = graph.index[change.task_id]
+        delays[i] += change.delay_days
+        if change.duration is not None:
+            durations[i] = change.duration
+
+    baseline = graph.schedule()
+    simulated = schedule_response(db_project, graph.schedule(durations, delays))
+    response = WhatIfSchedule.model_construct(
+        **dict(simulated),
+        baseline_end_date=(
+            db_project.start_date + timedelta(days=baseline.length)
+            if db_project.start_date
+            else None
+        ),
+        baseline_duration=baseline.length,
+        slip_days=simulated.duration - baseline.length,
+    )
+    return Response(
+        type_adapter(WhatIfSchedule).dump_json(response),
+        media_type="application/json",
+    )
+
+
+# values come straight from the engine, so the models are built without validation
+# and the routes dump them to JSON themselves, FastAPI would validate them again
+def schedule_response(project: Project, schedule: Schedule) -> ProjectSchedule:
+    graph = schedule.graph
+    start = project.start_date
+
+    def day(offset: int):
+        return start + timedelta(days=offset) if start else None
+
+    tasks = [
+        ScheduledTask.model_construct(
+            task_id=task_id,
+            dependency=(
+                graph.task_ids[graph.predecessor[i]]
+                if graph.predecessor[i] >= 0
+                else None
+            ),
+            duration=schedule.durations[i],
+            earliest_start=schedule.earliest_start[i],
+            earliest_finish=schedule.earliest_finish[i],
+            latest_start=schedule.latest_start[i],
+            latest_finish=schedule.latest_finish[i],
+            float=schedule.total_float(i),
+            critical=schedule.total_float(i) == 0,
+            start_date=day(schedule.earliest_start[i]),
+            end_date=day(schedule.earliest_finish[i]),
+        )
+        for i, task_id in enumerate(graph.task_ids)
+    ]
+    return ProjectSchedule.model_construct(
+        project_id=project.id,
+        start_date=start,
+        end_date=day(schedule.length),
+        duration=schedule.length,
+        critical_path=schedule.critical_path,
+        tasks=tasks,
+    )
+
+
 # delete project task
 @router.delete("/{id}/tasks", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_task(
@@ -419,10 +842,10 @@ async def delete_task(
     db: db_dependence,
     current_user: Annotated[User, Depends(get_current_admin)],
 ):
-    db_project_task = (
-        db.query(ProjectTask)
-        .filter(ProjectTask.task_id == task_id, ProjectTask.project_id == id)
-        .first()
+    db_project_task = await db.scalar(
+        select(ProjectTask).filter(
+            ProjectTask.task_id == task_id, ProjectTask.project_id == id
+        )
     )
     if db_project_task is None:
         raise HTTPException(
@@ -430,20 +853,18 @@ async def delete_task(
         )
 
     # delete project tracking
-    db_project_tracking = (
-        db.query(ProjectTracking)
-        .filter(
+    db_project_tracking = await db.scalar(
+        select(ProjectTracking).filter(
             ProjectTracking.project_id == id,
             ProjectTracking.user_id == db_project_task.assignee_id,
         )
-        .first()
     )
     if db_project_tracking is not None:
-        db.delete(db_project_tracking)
+        await db.delete(db_project_tracking)
 
     # delete project task
-    db.delete(db_project_task)
-    db.commit()
+    await db.delete(db_project_task)
+    await db.commit()
 
 
 # send email to assignee
@@ -452,11 +873,10 @@ async def send_email_to_assignee(
     id: int,
     notification: NotificationCreate,
     db: db_dependence,
-    background_tasks: BackgroundTasks,
     current_user: Annotated[User, Depends(get_current_admin)],
 ):
 
-    db_project = db.query(Project).filter(Project.id == id).first()
+    db_project = await db.scalar(select(Project).filter(Project.id == id))
     if db_project is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Project does not exist."
@@ -464,7 +884,7 @@ async def send_email_to_assignee(
 
     # get assignee email
     assignee_id = notification.to_user_id
-    assignee = db.query(User).filter(User.id == assignee_id).first()
+    assignee = await db.scalar(select(User).filter(User.id == assignee_id))
     if assignee is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Assignee does not exist."
@@ -479,13 +899,13 @@ async def send_email_to_assignee(
     )
 
     db.add(db_notification)
-    db.commit()
     print("email:", assignee.email)
-    # send email
-    background_tasks.add_task(
-        send_email,
+    # queue email, committed together with the notification
+    queue_email(
+        db,
         assignee.email,
         subject=notification.title,
         template_name="notification",
         data={"title": notification.title, "content": notification.content},
     )
+    await db.commit()
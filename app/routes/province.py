@@ -1,30 +1,75 @@
-from fastapi import HTTPException, APIRouter, Depends
-from typing import Annotated, List
-from app.database import get_db
-from sqlalchemy.orm import Session
+from fastapi import HTTPException, APIRouter, Depends, Header, Query, Response
+from typing import Annotated, List, Optional
+from app.core.etag import etag_matches, precondition_failed, weak_etag
+from app.core.geo import GeoData, get_geo_data
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.serialization import type_adapter
 from app.schemas.province import ProvinceBase
 from app.schemas.city import CityBase
-from app.models.province import Province
-from app.models.city import City
+from app.schemas.pagination import Page
 from starlette import status
 
-
 router = APIRouter(tags=["provinces"], prefix="/provinces")
-db_dependence = Annotated[Session, Depends(get_db)]
+geo_dependence = Annotated[GeoData, Depends(get_geo_data)]
 
 
+# provinces and cities are served from memory (app.core.geo), without a database query
+# responses carry an ETag, a client sending it back in If-None-Match gets 412 while the
+# data is unchanged and keeps its copy
 @router.post("/", response_model=List[ProvinceBase])
-async def get_all_provinces(db: db_dependence):
-    db_provinces = db.query(Province).all()
-    return [ProvinceBase.model_validate(province) for province in db_provinces]
+async def get_all_provinces(
+    geo: geo_dependence,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    if etag_matches(if_none_match, geo.etag):
+        return precondition_failed(geo.etag)
+    response = Response(geo.provinces_json, media_type="application/json")
+    response.headers["ETag"] = geo.etag
+    return response
 
 
-@router.post("/{province_id}/cities", response_model=List[CityBase])
-async def get_cities_by_province(db: db_dependence, province_id: int):
-    db_cities = db.query(City).filter(City.province_id == province_id).all()
-    if not db_cities:
+# a province's cities by name, one page at a time, optionally only names starting with name
+@router.post("/{province_id}/cities", response_model=Page[CityBase])
+async def get_cities_by_province(
+    geo: geo_dependence,
+    province_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    name: str = "",
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    if not geo.cities_by_province.get(province_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No cities found for this province.",
         )
-    return [CityBase.model_validate(city) for city in db_cities]
+    # one page of one query, changes only when the reference data does
+    etag = weak_etag(geo.etag, province_id, name, limit, cursor, include_total)
+    if etag_matches(if_none_match, etag):
+        return precondition_failed(etag)
+
+    after = None
+    if cursor:
+        values = decode_cursor(cursor)
+        if not isinstance(values.get("name"), str) or not isinstance(
+            values.get("id"), int
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+        after = (values["name"].casefold(), values["id"])
+    cities = geo.cities(province_id, name, after)
+    next_cursor = None
+    if len(cities) > limit:
+        next_cursor = encode_cursor(
+            {"name": cities[limit - 1].name, "id": cities[limit - 1].id}
+        )
+    total = len(geo.cities(province_id, name)) if include_total else None
+
+    page = Page[CityBase](items=cities[:limit], next_cursor=next_cursor, total=total)
+    response = Response(
+        type_adapter(Page[CityBase]).dump_json(page), media_type="application/json"
+    )
+    response.headers["ETag"] = etag
+    return response
@@ -1,67 +1,85 @@
-from fastapi import HTTPException, APIRouter, Depends
-from typing import Annotated, List
-from app.database import get_db
+from fastapi import HTTPException, APIRouter, Depends, Query, Response
+from typing import Annotated, List, Optional
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.serialization import json_response, type_adapter
+from app.core.sql_metrics import query_budget
+from app.core.task_catalog import get_task_catalog
+from app.database import get_async_db
+from app.schemas.pagination import Page
 from app.schemas.task import TaskBase, TaskCreate, TaskWithChildren
 from app.models.task import Task
 from app.models.user import User
-from app.routes.auth import get_current_admin
+from app.routes.auth import get_current_admin, get_current_user
 from starlette import status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(tags=["tasks"], prefix="/tasks")
-db_dependence = Annotated[Session, Depends(get_db)]
+db_dependence = Annotated[AsyncSession, Depends(get_async_db)]
 
 
-# get all tasks
-@router.post("/all", response_model=List[TaskWithChildren])
+# get all tasks, one page of top-level tasks with their children
+# served from the company's cached task catalog (app.core.task_catalog)
+@router.post(
+    "/all", response_model=Page[TaskWithChildren], dependencies=[query_budget(1)]
+)
 async def get_all_tasks(
     db: db_dependence,
     current_user: Annotated[User, Depends(get_current_admin)],
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
 ):
+    catalog = await get_task_catalog(db, current_user.company_id)
+    after = None
+    if cursor:
+        values = decode_cursor(cursor)
+        if not isinstance(values.get("sort_order"), int) or not isinstance(
+            values.get("id"), int
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+        after = (values["sort_order"], values["id"])
+    tasks = catalog.categories_after(after)
+    next_cursor = None
+    if len(tasks) > limit:
+        next_cursor = encode_cursor(
+            {"sort_order": tasks[limit - 1].sort_order, "id": tasks[limit - 1].id}
+        )
+    total = len(catalog.categories) if include_total else None
 
-    db_tasks = db.query(Task).filter(Task.company_id == current_user.company_id).all()
-
-    # create a dictionary of tasks
-    child_tasks = {}
-
-    # get all child tasks for each parent task
-    for task in db_tasks:
-        if task.parent_id:
-            if task.parent_id not in child_tasks:
-                child_tasks[task.parent_id] = []
-            child_tasks[task.parent_id].append(task)
-
-    # get all top-level tasks
-    tasks_with_children = []
-    for task in db_tasks:
-        if task.parent_id is None:  # if task has no parent
-            task_data = TaskWithChildren.model_validate(task)
-            task_data.children = [
-                TaskBase.model_validate(child) for child in child_tasks.get(task.id, [])
-            ]
-            tasks_with_children.append(task_data)
-
-    return tasks_with_children
+    page = Page[TaskWithChildren](
+        items=tasks[:limit], next_cursor=next_cursor, total=total
+    )
+    return Response(
+        type_adapter(Page[TaskWithChildren]).dump_json(page),
+        media_type="application/json",
+    )
 
 
 # get only categories
-@router.post("/categories", response_model=List[TaskBase])
+@router.post(
+    "/categories", response_model=List[TaskBase], dependencies=[query_budget(1)]
+)
 async def get_categories(
     db: db_dependence, current_user: Annotated[User, Depends(get_current_admin)]
 ):
-    db_categories = (
-        db.query(Task)
-        .filter(Task.parent_id.is_(None), Task.company_id == current_user.company_id)
-        .all()
-    )
-    return [TaskBase.model_validate(task) for task in db_categories]
+    catalog = await get_task_catalog(db, current_user.company_id)
+    return Response(catalog.categories_json, media_type="application/json")
 
 
-# get subtasks based on category
-@router.post("/{id}/subtasks", response_model=List[TaskBase])
-async def get_subtasks_by_category(id: int, db: db_dependence):
-    db_subtasks = db.query(Task).filter(Task.parent_id == id).all()
-    return [TaskBase.model_validate(task) for task in db_subtasks]
+# get subtasks based on category, open to every user of the company
+@router.post(
+    "/{id}/subtasks", response_model=List[TaskBase], dependencies=[query_budget(2)]
+)
+async def get_subtasks_by_category(
+    id: int,
+    db: db_dependence,
+    current_user: Annotated[User, Depends(get_current_user)],
+):
+    catalog = await get_task_catalog(db, current_user.company_id)
+    return json_response(List[TaskBase], list(catalog.subtasks(id)))
 
 
 # add task
@@ -72,13 +90,15 @@ async def create_tasks(
     task: TaskCreate,
 ):
 
-    db_task = db.query(Task).filter(Task.name == task.name).first()
+    db_task = await db.scalar(select(Task).filter(Task.name == task.name))
     if db_task is not None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Task already exists."
         )
-    new_task = Task(name=task.name, parent_id=task.parent_id)
+    new_task = Task(
+        name=task.name, parent_id=task.parent_id, company_id=current_user.company_id
+    )
     db.add(new_task)
-    db.commit()
-    db.refresh(new_task)
+    await db.commit()
+    await db.refresh(new_task)
     return new_task
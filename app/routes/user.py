@@ -1,33 +1,56 @@
-from fastapi import APIRouter, HTTPException, Depends
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
-from typing import Annotated, List
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, Optional
+from datetime import datetime, timezone
 from app.models.user import User
+from app.models.refresh_token import RefreshToken
+from app.models.deleted_user import DeletedUser
+from app.schemas.pagination import Page
 from app.schemas.user import UserBase, UserCreate, UserUpdate
-from app.database import get_db
-from app.routes.auth import get_current_admin
+from app.database import get_async_db
+from app.core.hashing import hash_password
+from app.core.pagination import keyset_page
+from app.core.readonly import select_schema
+from app.core.serialization import json_response
+from app.core.sql_metrics import query_budget
+from app.core.token_revocation import mark_user_deleted, revoke_user_tokens
+from app.routes.auth import (
+    get_current_admin,
+    invalidate_principal,
+    revoke_refresh_tokens,
+)
 from starlette import status
 
-
 # the function of annotated:
-# Specify the type: Informs FastAPI and type-checking tools that the type of db_dependency is Session.
-# Bind the dependency: Uses Depends(get_db) to tell FastAPI that the Session instance is provided by get_db.
+# Specify the type: Informs FastAPI and type-checking tools that the type of db_dependency is AsyncSession.
+# Bind the dependency: Uses Depends(get_async_db) to tell FastAPI that the AsyncSession instance is provided by get_async_db.
 router = APIRouter(tags=["users"], prefix="/users")
-db_dependency = Annotated[Session, Depends(get_db)]
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 
-@router.post("/all", response_model=List[UserBase])
+# company contractors, one page at a time
+@router.post("/all", response_model=Page[UserBase], dependencies=[query_budget(2)])
 async def get_users(
     db: db_dependency,
     current_user: Annotated[User, Depends(get_current_admin)],
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
 ):
-    db_users = (
-        db.query(User)
-        .filter(User.is_admin == False, User.company_id == current_user.company_id)
-        .all()
+    db_users, next_cursor, total = await keyset_page(
+        db,
+        select_schema(User, UserBase).filter(
+            User.is_admin == False, User.company_id == current_user.company_id
+        ),
+        [User.id],
+        limit,
+        cursor,
+        include_total,
+    )
+    return json_response(
+        Page[UserBase], {"items": db_users, "next_cursor": next_cursor, "total": total}
     )
-    return [UserBase.model_validate(user) for user in db_users]
 
 
 @router.post("/{id}", response_model=UserBase)
@@ -36,10 +59,8 @@ async def get_user(
     db: db_dependency,
     current_user: Annotated[User, Depends(get_current_admin)],
 ):
-    db_user = (
-        db.query(User)
-        .filter(User.id == id, User.company_id == current_user.company_id)
-        .first()
+    db_user = await db.scalar(
+        select(User).filter(User.id == id, User.company_id == current_user.company_id)
     )
     if db_user is None:
         raise HTTPException(
@@ -55,13 +76,13 @@ async def create_user(
     current_user: Annotated[User, Depends(get_current_admin)],
 ):
     # check if the user already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await db.scalar(select(User).filter(User.email == user.email))
     if db_user is not None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Email already registered"
         )
     # encrypt the password
-    hashed_password = pwd_context.hash(user.password)
+    hashed_password = await hash_password(user.password)
     new_user = User(
         first_name=user.first_name,
         last_name=user.last_name,
@@ -73,8 +94,8 @@ async def create_user(
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return UserBase(
         id=new_user.id,
         first_name=new_user.first_name,
@@ -93,11 +114,12 @@ async def update_user(
     current_user: Annotated[User, Depends(get_current_admin)],
 ):
 
-    db_user = db.query(User).filter(User.id == id).first()
+    db_user = await db.scalar(select(User).filter(User.id == id))
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
+    previous_email = db_user.email
     if user.first_name is not None:
         db_user.first_name = user.first_name
     if user.last_name is not None:
@@ -105,10 +127,20 @@ async def update_user(
     if user.email is not None:
         db_user.email = user.email
     if user.password is not None:
-        db_user.password = pwd_context.hash(user.password)
-
-    db.commit()
-    db.refresh(db_user)
+        db_user.password = await hash_password(user.password)
+    # tokens carry the email and were issued for the old password, so revoke them
+    credentials_changed = user.password is not None or db_user.email != previous_email
+    if credentials_changed:
+        db_user.tokens_valid_after = datetime.now(timezone.utc)
+        await revoke_refresh_tokens(db_user.id, db)
+
+    await db.commit()
+    await db.refresh(db_user)
+    # drop cached principals under both the old and new email
+    invalidate_principal(previous_email)
+    invalidate_principal(db_user.email)
+    if credentials_changed:
+        revoke_user_tokens(db_user.id)
     return db_user
 
 
@@ -119,13 +151,18 @@ async def delete_user(
     current_user: Annotated[User, Depends(get_current_admin)],
 ):
 
-    db_user = (
-        db.query(User)
-        .filter(User.id == id, User.company_id == current_user.company_id)
-        .first()
+    db_user = await db.scalar(
+        select(User).filter(User.id == id, User.company_id == current_user.company_id)
     )
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    db.delete(db_user)
-    db.commit()
+    await db.execute(delete(RefreshToken).where(RefreshToken.user_id == db_user.id))
+    # other workers reject the user's access tokens once their refresh loads this row
+    await db.merge(
+        DeletedUser(user_id=db_user.id, deleted_at=datetime.now(timezone.utc))
+    )
+    await db.delete(db_user)
+    await db.commit()
+    invalidate_principal(db_user.email)
+    mark_user_deleted(db_user.id)
     return db_user
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
+from datetime import date
 
 
 class ProjectDurationResponse(BaseModel):
@@ -14,6 +15,14 @@ class ProjectBudgetResponse(BaseModel):
     actual_budget: float
 
 
+# budget totals for the projects starting in one month ("2025-03") or quarter ("2025-Q1")
+class BudgetPeriodResponse(BaseModel):
+    period: str
+    project_count: int
+    estimate_budget: float
+    actual_budget: float
+
+
 class TaskBudgetResponse(BaseModel):
     task_name: str
     budget: float
@@ -32,3 +41,33 @@ class ProjectSummaryResponse(BaseModel):
     completion: float
     task_budgets: List[TaskBudgetResponse]
     task_durations: List[TaskDurationResponse]
+
+
+# one day, or the week starting that monday, of a contractor's calendar
+# busy_days have at least one task, assigned_days count every task on every day
+class WorkloadPeriodResponse(BaseModel):
+    period: date
+    busy_days: int
+    assigned_days: int
+    peak_concurrent: int
+    utilization: float
+
+
+class AssignmentRef(BaseModel):
+    project_id: int
+    task_id: int
+
+
+# days (end_date exclusive) when the contractor has more than one task at once
+class WorkloadConflictResponse(BaseModel):
+    start_date: date
+    end_date: date
+    tasks: List[AssignmentRef]
+
+
+class ContractorWorkloadResponse(BaseModel):
+    user_id: int
+    first_name: Optional[str]
+    last_name: Optional[str]
+    periods: List[WorkloadPeriodResponse]
+    conflicts: List[WorkloadConflictResponse]
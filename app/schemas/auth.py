@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 
 
 class SignUpRequest(BaseModel):
@@ -64,7 +65,21 @@ class ActivateEmailResponse(BaseModel):
         from_attributes = True
 
 
+# identity carried in the access token claims, used by admin endpoints without a users query
+class TokenUser(BaseModel):
+    id: int
+    email: str
+    company_id: int
+    is_admin: bool
+    role: str
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
     type: str
+    refresh_token: Optional[str] = None
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
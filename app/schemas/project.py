@@ -1,8 +1,14 @@
-from pydantic import BaseModel, Field, model_serializer
-from typing import Optional, List, Union
+from pydantic import BaseModel, Field, PlainSerializer
+from typing import Annotated, Optional, List, Union
 from datetime import datetime
 from app.models.project import ProjectStatus, ProjectPriority
 
+# amounts are sent as currency strings, e.g. "12,500.00"
+# the formatter is bound once here and pydantic-core calls it straight for each amount,
+# the rest of the model never goes through python
+format_currency = "{:,.2f}".format
+Currency = Annotated[float, PlainSerializer(format_currency, return_type=str)]
+
 
 # schema for outputting project data
 class ProjectBase(BaseModel):
@@ -15,7 +21,7 @@ class ProjectBase(BaseModel):
     postal_code: Optional[str] = Field(None, max_length=10)
     city_id: int
     province_id: int
-    budget: float
+    budget: Currency
     status: ProjectStatus
     start_date: Optional[datetime] = None
     estimated_duration: Optional[int] = None
@@ -23,15 +29,6 @@ class ProjectBase(BaseModel):
     actual_end_date: Optional[datetime] = None
     actual_budget: Optional[float] = None
 
-    @model_serializer(mode="plain")
-    def serialize(self):
-        data = self.__dict__.copy()
-        if abs(data["budget"]) >= 1000:
-            data["budget"] = f"{data['budget']:,.2f}"
-        else:
-            data["budget"] = f"{data['budget']:.2f}"
-        return data
-
     class Config:
         from_attributes = True
 
@@ -38,6 +38,20 @@ class ProjectTaskDetail(BaseModel):
         from_attributes = True
 
 
+# dates of a dependent task moved along with the task it waits on
+class TaskDateShift(BaseModel):
+    task_id: int
+    start_date: Optional[datetime]
+    end_date: Optional[datetime]
+    previous_start_date: Optional[datetime]
+    previous_end_date: Optional[datetime]
+
+
+# updated project task, with the downstream tasks whose dates were shifted
+class ProjectTaskUpdateResponse(ProjectTaskDetail):
+    shifted_tasks: List[TaskDateShift] = []
+
+
 class TaskWithProjectTask(BaseModel):
     task: TaskBase
     project_task: ProjectTaskDetail
@@ -86,3 +100,17 @@ class ProjectTaskUpdate(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+# one rejected patch of a bulk task update, index is its position in the request
+class BulkTaskUpdateError(BaseModel):
+    index: int
+    task_id: Optional[int]
+    detail: str
+
+
+class BulkTaskUpdateResponse(BaseModel):
+    project_status: ProjectStatus
+    updated: List[ProjectTaskDetail]
+    errors: List[BulkTaskUpdateError]
+    shifted_tasks: List[TaskDateShift] = []
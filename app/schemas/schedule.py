@@ -0,0 +1,45 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+
+# start/finish are days from the project start, float is how many days the task can slip
+class ScheduledTask(BaseModel):
+    task_id: int
+    dependency: Optional[int]
+    duration: int
+    earliest_start: int
+    earliest_finish: int
+    latest_start: int
+    latest_finish: int
+    float: int
+    critical: bool
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
+
+class ProjectSchedule(BaseModel):
+    project_id: int
+    start_date: Optional[datetime]
+    end_date: Optional[datetime]
+    duration: int
+    critical_path: List[int]
+    tasks: List[ScheduledTask]
+
+
+# a hypothetical change to one task: it starts delay_days later and/or takes duration days
+class TaskChange(BaseModel):
+    task_id: int
+    delay_days: int = Field(default=0, ge=0)
+    duration: Optional[int] = Field(default=None, ge=0)
+
+
+class WhatIfRequest(BaseModel):
+    changes: List[TaskChange] = Field(..., max_length=500)
+
+
+# the simulated schedule, and how far the project end moves compared with the current plan
+class WhatIfSchedule(ProjectSchedule):
+    baseline_end_date: Optional[datetime]
+    baseline_duration: int
+    slip_days: int
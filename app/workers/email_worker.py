@@ -0,0 +1,100 @@
+"""
+Email outbox worker.
+
+Delivers rows queued in email_outbox by the request handlers. Run it as its
+own process next to the API:
+
+    python -m app.workers.email_worker
+
+Several workers can run at once, each batch is claimed with
+SELECT ... FOR UPDATE SKIP LOCKED so no two workers send the same row.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select
+from app.core.email import load_templates, send_email, smtp_pool
+from app.core.settings import settings
+from app.database import AsyncSessionLocal, async_engine
+from app.models.email_outbox import EmailOutbox, EmailStatus
+import app.models
+
+
+def retry_delay(attempts: int) -> timedelta:
+    seconds = settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, settings.EMAIL_OUTBOX_RETRY_MAX_SECONDS))
+
+
+def latency_ms(created_at: datetime, sent_at: datetime) -> int:
+    # sqlite hands back naive datetimes, they are stored as UTC
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return int((sent_at - created_at).total_seconds() * 1000)
+
+
+# claim one batch of due emails and try to send them, returns how many were claimed
+async def deliver_batch() -> int:
+    async with AsyncSessionLocal() as db:
+        rows = (
+            await db.scalars(
+                select(EmailOutbox)
+                .filter(
+                    EmailOutbox.status == EmailStatus.PENDING,
+                    EmailOutbox.next_attempt_at <= datetime.now(timezone.utc),
+                )
+                .order_by(EmailOutbox.id)
+                .limit(settings.EMAIL_OUTBOX_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            )
+        ).all()
+
+        sent_latencies = []
+        for row in rows:
+            row.attempts += 1
+            try:
+                await send_email(row.email_to, row.subject, row.template_name, row.data)
+            except Exception as e:
+                row.last_error = str(e)[:500]
+                if row.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                    row.status = EmailStatus.FAILED
+                else:
+                    row.next_attempt_at = datetime.now(timezone.utc) + retry_delay(
+                        row.attempts
+                    )
+                continue
+            row.status = EmailStatus.SENT
+            row.sent_at = datetime.now(timezone.utc)
+            row.delivery_latency_ms = latency_ms(row.created_at, row.sent_at)
+            sent_latencies.append(row.delivery_latency_ms)
+
+        # releases the row locks taken by the claim
+        await db.commit()
+
+    if rows:
+        average = sum(sent_latencies) / len(sent_latencies) if sent_latencies else 0
+        print(
+            f"email outbox: claimed={len(rows)} sent={len(sent_latencies)} "
+            f"failed={len(rows) - len(sent_latencies)} avg_latency_ms={average:.0f}"
+        )
+    return len(rows)
+
+
+async def run():
+    load_templates()
+    try:
+        while True:
+            try:
+                claimed = await deliver_batch()
+            except Exception as e:
+                print("email outbox: batch failed:", str(e))
+                claimed = 0
+            # a full batch means there is probably more waiting
+            if claimed < settings.EMAIL_OUTBOX_BATCH_SIZE:
+                await asyncio.sleep(settings.EMAIL_OUTBOX_POLL_SECONDS)
+    finally:
+        await smtp_pool.close()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
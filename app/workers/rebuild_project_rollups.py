@@ -0,0 +1,69 @@
+"""
+Rebuild the project rollup columns.
+
+The rollups on projects (actual_budget, amount_due_total and the per-status
+task counts) are kept up to date as project tasks change. If they ever drift,
+e.g. after rows were edited by hand or by a bulk statement that skipped the
+rollup update, recompute them all from project_tasks:
+
+    python -m app.workers.rebuild_project_rollups
+    python -m app.workers.rebuild_project_rollups --project-id 42
+"""
+
+import argparse
+import asyncio
+from sqlalchemy import func, select, update
+from app.database import AsyncSessionLocal, async_engine
+from app.models.project import Project
+from app.models.project_task import ProjectTask, STATUS_COUNT_COLUMNS
+import app.models
+
+
+def rollup_values() -> dict:
+    def aggregate(expression, *filters):
+        return (
+            select(expression)
+            .filter(ProjectTask.project_id == Project.id, *filters)
+            .scalar_subquery()
+        )
+
+    values = {
+        Project.actual_budget: func.coalesce(
+            aggregate(func.sum(ProjectTask.budget)), 0
+        ),
+        Project.amount_due_total: func.coalesce(
+            aggregate(func.sum(ProjectTask.amount_due)), 0
+        ),
+    }
+    for task_status, column in STATUS_COUNT_COLUMNS.items():
+        values[column] = aggregate(func.count(), ProjectTask.status == task_status)
+    return values
+
+
+# recompute every project's rollups (or one project's) in a single UPDATE
+async def rebuild(project_id: int = None) -> int:
+    statement = (
+        update(Project)
+        .values(rollup_values())
+        .execution_options(synchronize_session=False)
+    )
+    if project_id is not None:
+        statement = statement.filter(Project.id == project_id)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(statement)
+        await db.commit()
+    return result.rowcount
+
+
+async def run(args):
+    try:
+        updated = await rebuild(args.project_id)
+        print(f"project rollups rebuilt: {updated} projects")
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--project-id", type=int, default=None)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,53 @@
+"""
+Setup shared by the benchmark scripts, which run as python benchmarks/<name>.py and
+import it as _common: the seeded scratch database and a statement counter.
+"""
+
+import contextlib
+from types import SimpleNamespace
+
+from sqlalchemy import event
+
+from app.database import Base, async_engine, engine
+from app.init.init_db import (
+    initialize_default_countries,
+    initialize_canadian_province,
+    initialize_canadian_cities,
+    initial_company,
+)
+import app.models
+
+
+# the tables and the reference rows init_db seeds: countries, provinces, cities, company
+def init_scratch_db():
+    Base.metadata.create_all(bind=engine)
+    initialize_default_countries()
+    initialize_canadian_province()
+    initialize_canadian_cities()
+    initial_company()
+
+
+# init_scratch_db, and the async engine's pool closed however the benchmark ends
+# an open pool keeps the event loop, and the script, from exiting
+@contextlib.asynccontextmanager
+async def scratch_db():
+    init_scratch_db()
+    try:
+        yield
+    finally:
+        await async_engine.dispose()
+
+
+# statements the async engine runs inside the block, read from counter.statements
+@contextlib.contextmanager
+def count_statements():
+    counter = SimpleNamespace(statements=0)
+
+    def count_statement(*args):
+        counter.statements += 1
+
+    event.listen(async_engine.sync_engine, "after_cursor_execute", count_statement)
+    try:
+        yield counter
+    finally:
+        event.remove(async_engine.sync_engine, "after_cursor_execute", count_statement)
@@ -0,0 +1,124 @@
+"""
+Budget analytics benchmark.
+
+Bulk-inserts --projects projects with --tasks project tasks each for one
+company, then times the old budget comparison (load every project, one SUM
+query per project) against analytics.get_projects_budget_comparison per
+project and per quarter. Prints the statements run and the wall time. Use a
+scratch database:
+
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/budget_analytics.py --projects 10000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import func, insert, select
+
+from app.database import AsyncSessionLocal
+from app.models.city import City
+from app.models.project import Project
+from app.models.project_task import ProjectTask
+from app.models.task import Task
+from app.routes.analytics import get_projects_budget_comparison
+from app.workers.rebuild_project_rollups import rebuild
+from _common import count_statements, scratch_db
+
+
+async def seed(projects: int, tasks: int):
+    run = uuid.uuid4().hex[:8]
+    started = datetime(2023, 1, 1)
+    async with AsyncSessionLocal() as db:
+        city = await db.scalar(select(City))
+        task_ids = (
+            await db.scalars(
+                insert(Task).returning(Task.id),
+                [{"name": f"task {i}", "sort_order": i} for i in range(tasks)],
+            )
+        ).all()
+        project_ids = (
+            await db.scalars(
+                insert(Project).returning(Project.id),
+                [
+                    {
+                        "name": f"bench {run} {p}",
+                        "address": "1 Main St",
+                        "city_id": city.id,
+                        "province_id": city.province_id,
+                        "budget": random.randint(1, 100) * 1000,
+                        "start_date": started + timedelta(days=p % 730),
+                    }
+                    for p in range(projects)
+                ],
+            )
+        ).all()
+        await db.execute(
+            insert(ProjectTask),
+            [
+                {
+                    "project_id": project_id,
+                    "task_id": task_id,
+                    "budget": random.randint(1, 100) * 100,
+                }
+                for project_id in project_ids
+                for task_id in task_ids
+            ],
+        )
+        await db.commit()
+    # bulk inserts skip the rollup events
+    await rebuild()
+
+
+async def old_budget(db) -> int:
+    # the query pattern before the grouped aggregate
+    projects = (await db.scalars(select(Project).order_by(Project.budget.desc()))).all()
+    for project in projects:
+        await db.scalar(
+            select(func.sum(ProjectTask.budget)).filter(
+                ProjectTask.project_id == project.id
+            )
+        )
+    return len(projects)
+
+
+async def new_budget(db, period) -> int:
+    rows = await get_projects_budget_comparison(
+        db=db,
+        current_user=SimpleNamespace(company_id=1),
+        start_date=None,
+        end_date=None,
+        period=period,
+    )
+    return len(rows)
+
+
+async def measure(label: str, budget, *args):
+    async with AsyncSessionLocal() as db:
+        with count_statements() as counter:
+            started = time.perf_counter()
+            rows = await budget(db, *args)
+            elapsed = time.perf_counter() - started
+    print(
+        f"{label:<16} rows={rows:<6} statements={counter.statements:<6} "
+        f"{elapsed * 1000:8.1f} ms"
+    )
+
+
+async def run(args):
+    async with scratch_db():
+        await seed(args.projects, args.tasks)
+        await measure("old pattern:", old_budget)
+        await measure("per project:", new_budget, None)
+        await measure("by quarter:", new_budget, "quarter")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, default=10000)
+    parser.add_argument("--tasks", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,69 @@
+"""
+Concurrent-request throughput benchmark (needs httpx).
+
+Logs in once, then fires CONCURRENCY requests at a time against a few read
+endpoints and prints requests/sec and latency percentiles. Run it against a
+server started from the commit before and after a change to compare, e.g.
+
+    uvicorn app.main:app --workers 1
+    python benchmarks/concurrent_requests.py --email test@example.com --password ...
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+ENDPOINTS = [
+    "/projects/all",
+    "/tasks/all",
+    "/users/all",
+    "/analytics/budget",
+    "/provinces/",
+]
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> dict:
+    response = await client.post(
+        "/auth/token", data={"username": email, "password": password}
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        headers = await login(client, args.email, args.password)
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies = []
+
+        async def one(path: str):
+            async with semaphore:
+                started = time.perf_counter()
+                await client.post(path, headers=headers)
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(one(ENDPOINTS[i % len(ENDPOINTS)]) for i in range(args.requests))
+        )
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"requests:     {args.requests} (concurrency {args.concurrency})")
+    print(f"elapsed:      {elapsed:.2f}s")
+    print(f"throughput:   {args.requests / elapsed:.1f} req/s")
+    print(f"p50 latency:  {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"p95 latency:  {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,126 @@
+"""
+Contractor dashboard benchmark.
+
+Seeds one contractor with --projects projects and --tasks assigned tasks on
+each (plus the same number of tasks assigned to someone else), then times the
+old dashboard query pattern (join with duplicates, one Task query per project)
+against projects.get_contractor_projects walking every page. Prints the
+statements run and the wall time for both. Use a scratch database:
+
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/contractor_dashboard.py --projects 50 --tasks 10
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+
+import orjson
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models.city import City
+from app.models.project import Project
+from app.models.project_task import ProjectTask
+from app.models.task import Task
+from app.models.user import User
+from app.routes.project import get_contractor_projects
+from _common import count_statements, scratch_db
+
+
+async def seed(projects: int, tasks: int) -> int:
+    run = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        city = await db.scalar(select(City))
+        contractor, other = (
+            User(email=f"{name}-{run}@example.com", password="x")
+            for name in ("contractor", "other")
+        )
+        db.add_all([contractor, other])
+        db_tasks = [Task(name=f"task {i}", sort_order=i) for i in range(tasks * 2)]
+        db.add_all(db_tasks)
+        await db.flush()
+        for p in range(projects):
+            project = Project(
+                name=f"bench {run} {p}",
+                address="1 Main St",
+                city_id=city.id,
+                province_id=city.province_id,
+                budget=1000,
+            )
+            db.add(project)
+            await db.flush()
+            db.add_all(
+                ProjectTask(
+                    project_id=project.id,
+                    task_id=task.id,
+                    assignee_id=contractor.id if i < tasks else other.id,
+                    budget=10,
+                )
+                for i, task in enumerate(db_tasks)
+            )
+        await db.commit()
+        return contractor.id
+
+
+async def old_dashboard(db, user_id: int) -> int:
+    # the query pattern before the redesign
+    db_projects = (
+        await db.scalars(
+            select(Project)
+            .join(ProjectTask, ProjectTask.project_id == Project.id)
+            .filter(ProjectTask.assignee_id == user_id)
+        )
+    ).all()
+    for project in db_projects:
+        (
+            await db.scalars(
+                select(Task)
+                .join(ProjectTask, ProjectTask.task_id == Task.id)
+                .filter(ProjectTask.project_id == project.id)
+            )
+        ).all()
+    return len(db_projects)
+
+
+async def new_dashboard(db, user_id: int, limit: int) -> int:
+    user = SimpleNamespace(id=user_id)
+    returned, cursor = 0, None
+    while True:
+        response = await get_contractor_projects(
+            db=db, current_user=user, limit=limit, cursor=cursor
+        )
+        # the route returns the JSON body (serialization.json_response)
+        page = orjson.loads(response.body)
+        returned += len(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return returned
+
+
+async def measure(label: str, dashboard, *args):
+    async with AsyncSessionLocal() as db:
+        with count_statements() as counter:
+            started = time.perf_counter()
+            projects = await dashboard(db, *args)
+            elapsed = time.perf_counter() - started
+    print(
+        f"{label:<16} projects={projects:<6} statements={counter.statements:<6} "
+        f"{elapsed * 1000:8.1f} ms"
+    )
+
+
+async def run(args):
+    async with scratch_db():
+        user_id = await seed(args.projects, args.tasks)
+        await measure("old pattern:", old_dashboard, user_id)
+        await measure("paginated:", new_dashboard, user_id, args.limit)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=20)
+    asyncio.run(run(parser.parse_args()))
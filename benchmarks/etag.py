@@ -0,0 +1,105 @@
+"""
+Project detail polling benchmark.
+
+Bulk-inserts one project with --tasks project tasks, then polls
+POST /projects/{id} --polls times through TestClient, once as a client
+without a cache and once sending the last ETag in If-None-Match. Prints the
+response bytes and time per poll for both. Use a scratch database:
+
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/etag.py --tasks 200
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select
+
+from app.database import AsyncSessionLocal, async_engine
+from app.models.city import City
+from app.models.project import Project
+from app.models.project_task import ProjectTask
+from app.models.task import Task
+from app.routes import project
+from app.routes.auth import get_current_admin
+from app.workers.rebuild_project_rollups import rebuild
+from _common import init_scratch_db
+
+
+async def seed(tasks: int) -> int:
+    run = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        city = await db.scalar(select(City))
+        task_ids = (
+            await db.scalars(
+                insert(Task).returning(Task.id),
+                [{"name": f"task {i}", "sort_order": i} for i in range(tasks)],
+            )
+        ).all()
+        project_id = await db.scalar(
+            insert(Project)
+            .values(
+                name=f"bench {run}",
+                address="1 Main St",
+                city_id=city.id,
+                province_id=city.province_id,
+                budget=1000,
+            )
+            .returning(Project.id)
+        )
+        await db.execute(
+            insert(ProjectTask),
+            [
+                {"project_id": project_id, "task_id": task_id, "budget": 10}
+                for task_id in task_ids
+            ],
+        )
+        await db.commit()
+    # bulk inserts skip the rollup events
+    await rebuild(project_id)
+    await async_engine.dispose()
+    return project_id
+
+
+def poll(client: TestClient, url: str, polls: int, conditional: bool):
+    etag = None
+    size = 0
+    started = time.perf_counter()
+    for _ in range(polls):
+        headers = {"If-None-Match": etag} if conditional and etag else {}
+        response = client.post(url, headers=headers)
+        size += len(response.content)
+        etag = response.headers["etag"]
+    elapsed = time.perf_counter() - started
+    label = "If-None-Match:" if conditional else "no cache:"
+    print(
+        f"{label:<16} status={response.status_code} {size / polls:9.0f} bytes/poll "
+        f"{elapsed / polls * 1000:7.2f} ms/poll"
+    )
+
+
+def run(args):
+    init_scratch_db()
+    project_id = asyncio.run(seed(args.tasks))
+
+    api = FastAPI(default_response_class=ORJSONResponse)
+    api.include_router(project.router)
+    api.dependency_overrides[get_current_admin] = lambda: SimpleNamespace(
+        id=1, company_id=1
+    )
+    with TestClient(api) as client:
+        url = f"/projects/{project_id}"
+        poll(client, url, args.polls, conditional=False)
+        poll(client, url, args.polls, conditional=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--polls", type=int, default=200)
+    run(parser.parse_args())
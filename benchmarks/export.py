@@ -0,0 +1,99 @@
+"""
+Project export memory benchmark.
+
+Bulk-inserts --projects projects for one company, then exports them twice:
+the old way (load every Project, build the list of ProjectBase models and
+serialize it) and through export.stream_export, consuming the chunks as a
+client would. Prints the peak memory traced while each export runs and the
+wall time; run it with a few --projects sizes to see the streaming peak stay
+flat. Use a scratch database:
+
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/export.py --projects 100000
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+import uuid
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+
+from app.core.export import stream_export
+from app.core.readonly import select_schema
+from app.database import AsyncSessionLocal
+from app.models.city import City
+from app.models.project import Project
+from app.schemas.project import ProjectBase
+from _common import scratch_db
+
+
+async def seed(projects: int):
+    run = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        city = await db.scalar(select(City))
+        await db.execute(
+            insert(Project),
+            [
+                {
+                    "name": f"bench {run} {p}",
+                    "address": "1 Main St",
+                    "city_id": city.id,
+                    "province_id": city.province_id,
+                    "budget": 1000 + p,
+                }
+                for p in range(projects)
+            ],
+        )
+        await db.commit()
+
+
+async def old_export() -> int:
+    # what a dump through get_all_projects cost before streaming: the whole table in memory
+    async with AsyncSessionLocal() as db:
+        projects = (
+            await db.scalars(select(Project).filter(Project.company_id == 1))
+        ).all()
+        body = TypeAdapter(list[ProjectBase]).dump_json(
+            [ProjectBase.model_validate(project) for project in projects]
+        )
+    return len(body)
+
+
+async def streamed_export() -> int:
+    query = (
+        select_schema(Project, ProjectBase)
+        .filter(Project.company_id == 1)
+        .order_by(Project.id)
+    )
+    size = 0
+    async for chunk in stream_export(query, ProjectBase, "json"):
+        size += len(chunk)
+    return size
+
+
+async def measure(label: str, export):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = await export()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<10} bytes={size:<10} peak={peak / 2**20:8.1f} MiB "
+        f"{elapsed * 1000:8.1f} ms"
+    )
+
+
+async def run(args):
+    async with scratch_db():
+        await seed(args.projects)
+        await measure("list:", old_export)
+        await measure("stream:", streamed_export)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, default=100000)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,67 @@
+"""
+Login vs refresh-token renewal benchmark (needs httpx).
+
+Renews an access token N times, first by re-posting the password to
+/auth/token and then by rotating a refresh token through /auth/refresh, and
+prints throughput for both. The bcrypt time the server spent is read from
+/metrics/ so the CPU saved per renewal is visible, e.g.
+
+    uvicorn app.main:app --workers 1
+    python benchmarks/login_vs_refresh.py --email test@example.com --password ...
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+
+async def hash_seconds(client: httpx.AsyncClient, access_token: str) -> float:
+    response = await client.get(
+        "/metrics/", headers={"Authorization": f"Bearer {access_token}"}
+    )
+    response.raise_for_status()
+    return response.json()["password_hashing"]["total_seconds"]
+
+
+async def run(args):
+    form = {"username": args.email, "password": args.password}
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        token = (await client.post("/auth/token", data=form)).json()
+        hashed_before = await hash_seconds(client, token["access_token"])
+
+        started = time.perf_counter()
+        for _ in range(args.renewals):
+            token = (await client.post("/auth/token", data=form)).json()
+        login_elapsed = time.perf_counter() - started
+        hashed_login = await hash_seconds(client, token["access_token"])
+
+        started = time.perf_counter()
+        for _ in range(args.renewals):
+            response = await client.post(
+                "/auth/refresh", json={"refresh_token": token["refresh_token"]}
+            )
+            response.raise_for_status()
+            token = response.json()
+        refresh_elapsed = time.perf_counter() - started
+        hashed_refresh = await hash_seconds(client, token["access_token"])
+
+    print(f"renewals:        {args.renewals}")
+    print(
+        f"password login:  {args.renewals / login_elapsed:.1f}/s, "
+        f"bcrypt {hashed_login - hashed_before:.2f}s"
+    )
+    print(
+        f"refresh token:   {args.renewals / refresh_elapsed:.1f}/s, "
+        f"bcrypt {hashed_refresh - hashed_login:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--renewals", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
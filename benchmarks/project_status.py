@@ -0,0 +1,132 @@
+"""
+Project status update microbenchmark.
+
+Bulk-inserts one project with --tasks project tasks, then flips task statuses
+--updates times, first the old way (commit, load every ProjectTask of the
+project, build a set of statuses) and then through projects.update_task,
+which reads the status counters kept on the project. Prints the average time
+per update for both. Use a scratch database:
+
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/project_status.py --tasks 2000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import time
+import uuid
+from collections import Counter
+from types import SimpleNamespace
+
+from sqlalchemy import insert, select
+
+from app.database import AsyncSessionLocal
+from app.models.city import City
+from app.models.project import Project
+from app.models.project_task import ProjectTask, TaskStatus
+from app.models.task import Task
+from app.routes.project import determine_project_status, update_task
+from app.schemas.project_task import ProjectTaskUpdate
+from app.workers.rebuild_project_rollups import rebuild
+from _common import scratch_db
+
+STATUSES = itertools.cycle(
+    [TaskStatus.IN_PROGRESS, TaskStatus.COMPLETED, TaskStatus.DELAYED]
+)
+
+
+async def seed(tasks: int) -> tuple[int, list[int]]:
+    run = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        city = await db.scalar(select(City))
+        task_ids = (
+            await db.scalars(
+                insert(Task).returning(Task.id),
+                [{"name": f"task {i}", "sort_order": i} for i in range(tasks)],
+            )
+        ).all()
+        project_id = await db.scalar(
+            insert(Project)
+            .values(
+                name=f"bench {run}",
+                address="1 Main St",
+                city_id=city.id,
+                province_id=city.province_id,
+                budget=1000,
+            )
+            .returning(Project.id)
+        )
+        await db.execute(
+            insert(ProjectTask),
+            [
+                {"project_id": project_id, "task_id": task_id, "budget": 10}
+                for task_id in task_ids
+            ],
+        )
+        await db.commit()
+    # bulk inserts skip the rollup events
+    await rebuild(project_id)
+    return project_id, task_ids
+
+
+async def old_update(db, project_id: int, task_id: int, task_status: TaskStatus):
+    # the status update before the counters: commit, then hydrate every task
+    project = await db.scalar(select(Project).filter(Project.id == project_id))
+    project_task = await db.scalar(
+        select(ProjectTask).filter(
+            ProjectTask.project_id == project_id, ProjectTask.task_id == task_id
+        )
+    )
+    project_task.status = task_status
+    await db.commit()
+    all_tasks = (
+        await db.scalars(
+            select(ProjectTask).filter(ProjectTask.project_id == project_id)
+        )
+    ).all()
+    project_status = determine_project_status(
+        Counter(task.status for task in all_tasks)
+    )
+    if project_status != project.status:
+        project.status = project_status
+        await db.commit()
+
+
+async def new_update(db, project_id: int, task_id: int, task_status: TaskStatus):
+    task_update = ProjectTaskUpdate(
+        task_id=task_id, assignee_id=None, status=task_status
+    )
+    # update_task prints its progress, keep it out of the timings output
+    with contextlib.redirect_stdout(io.StringIO()):
+        await update_task(
+            id=project_id,
+            task_update=task_update,
+            db=db,
+            current_user=SimpleNamespace(company_id=1),
+        )
+
+
+async def measure(label: str, update, project_id: int, task_ids: list, updates: int):
+    started = time.perf_counter()
+    for i in range(updates):
+        # a fresh session per update, like a request
+        async with AsyncSessionLocal() as db:
+            await update(db, project_id, task_ids[i % len(task_ids)], next(STATUSES))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<16} {elapsed / updates * 1000:8.2f} ms/update")
+
+
+async def run(args):
+    async with scratch_db():
+        project_id, task_ids = await seed(args.tasks)
+        await measure("load all tasks:", old_update, project_id, task_ids, args.updates)
+        await measure("counters:", new_update, project_id, task_ids, args.updates)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--updates", type=int, default=200)
+    asyncio.run(run(parser.parse_args()))
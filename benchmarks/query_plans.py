@@ -0,0 +1,100 @@
+"""
+Access-path check for the hot queries in app/routes.
+
+EXPLAINs each query shape against DATABASE_URL and fails if the planner does
+not use the index meant for it. On Postgres sequential scans are disabled for
+the check, so it also works on small development tables. Run after migrating:
+
+    alembic upgrade head
+    python benchmarks/query_plans.py
+"""
+
+import json
+import sys
+
+from sqlalchemy import select, text
+
+from app.database import engine
+from app.models.notification import Notification
+from app.models.project import Project, ProjectStatus
+from app.models.project_task import ProjectTask
+from app.models.task import Task
+from app.models.user import User
+import app.models
+
+# (description, query, index the planner should pick)
+HOT_QUERIES = [
+    (
+        "contractor dashboard (projects.get_contractor_projects)",
+        select(ProjectTask).filter(ProjectTask.assignee_id == 1),
+        "ix_project_tasks_assignee_id",
+    ),
+    (
+        "reverse dependencies (schedule.downstream_tasks)",
+        select(ProjectTask.task_id).filter(
+            ProjectTask.project_id == 1, ProjectTask.dependency == 1
+        ),
+        "ix_project_tasks_project_id_dependency",
+    ),
+    (
+        "task catalog (tasks.get_categories)",
+        select(Task).filter(Task.parent_id.is_(None), Task.company_id == 1),
+        "ix_tasks_company_id_parent_id",
+    ),
+    (
+        "duration analytics (analytics.get_projects_duration_comparison)",
+        select(Project)
+        .filter(Project.company_id == 1, Project.status == ProjectStatus.COMPLETED)
+        .order_by(Project.created_at.desc())
+        .limit(10),
+        "ix_projects_company_id_status_created_at",
+    ),
+    (
+        "notifications by recipient",
+        select(Notification).filter(Notification.to_user_id == 1),
+        "ix_notifications_to_user_id",
+    ),
+    (
+        "notifications by project (projects.delete_project)",
+        select(Notification).filter(Notification.project_id == 1),
+        "ix_notifications_project_id",
+    ),
+    (
+        "verification code (auth.verify_code)",
+        select(User).filter(User.verification_code == "12345"),
+        "ix_users_verification_code",
+    ),
+]
+
+
+def explain(connection, sql: str) -> str:
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SET enable_seqscan = off"))
+        plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        return json.dumps(plan)
+    if connection.dialect.name == "sqlite":
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        return "\n".join(row[-1] for row in rows)
+    raise SystemExit(f"unsupported database: {connection.dialect.name}")
+
+
+def main() -> int:
+    failures = 0
+    with engine.connect() as connection:
+        for description, query, index_name in HOT_QUERIES:
+            sql = str(
+                query.compile(
+                    dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+                )
+            )
+            plan = explain(connection, sql)
+            ok = index_name in plan
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {description}: {index_name}")
+            if not ok:
+                print(plan)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""
+Read-only list query benchmark.
+
+Bulk-inserts --rows projects, users, top-level tasks (with --children
+subtasks each) and cities for one company/province, then walks every page
+(--limit rows) of /projects/all, /users/all, /tasks/all and
+/provinces/{id}/cities twice:
+
+- orm: the same keyset pages read as hydrated ORM instances, the way the
+  list endpoints read them before readonly.select_schema
+- columns: the endpoint functions as they are, plain rows of the schema's
+  columns validated as dicts
+
+/tasks/all and the cities are served from in-memory caches since
+app.core.task_catalog and app.core.geo, their second line is labelled
+catalog/geo and times a warm cache (best of --repeat), not a query.
+
+Each page uses a fresh session, like a request. Prints the time per page
+(best of --repeat walks) and the peak memory traced during one more walk.
+Use a scratch database:
+
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/readonly_queries.py --rows 10000
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from types import SimpleNamespace
+
+import orjson
+from sqlalchemy import insert, select, tuple_
+
+from app.core.geo import get_geo_data
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.serialization import json_response
+from app.database import AsyncSessionLocal
+from app.models.city import City
+from app.models.project import Project
+from app.models.task import Task
+from app.models.user import User
+from app.routes.project import get_all_projects
+from app.routes.province import get_cities_by_province
+from app.routes.task import get_all_tasks
+from app.routes.user import get_users
+from app.schemas.city import CityBase
+from app.schemas.pagination import Page
+from app.schemas.project import ProjectBase
+from app.schemas.task import TaskBase, TaskWithChildren
+from app.schemas.user import UserBase
+from _common import scratch_db
+
+PROVINCE_ID = 2
+ADMIN = SimpleNamespace(company_id=1)
+
+
+async def seed(rows: int, children: int):
+    run = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            insert(Project),
+            [
+                {
+                    "name": f"bench {run} {p}",
+                    "address": "1 Main St",
+                    "city_id": 1,
+                    "province_id": PROVINCE_ID,
+                    "budget": 1000 + p,
+                }
+                for p in range(rows)
+            ],
+        )
+        await db.execute(
+            insert(User),
+            [
+                {
+                    "email": f"bench-{run}-{u}@example.com",
+                    "first_name": "Bench",
+                    "last_name": str(u),
+                    "password": "x",
+                }
+                for u in range(rows)
+            ],
+        )
+        parent_ids = (
+            await db.scalars(
+                insert(Task).returning(Task.id),
+                [{"name": f"bench {t}", "sort_order": t} for t in range(rows)],
+            )
+        ).all()
+        await db.execute(
+            insert(Task),
+            [
+                {"name": f"bench {c}", "sort_order": c, "parent_id": parent_id}
+                for parent_id in parent_ids
+                for c in range(children)
+            ],
+        )
+        await db.execute(
+            insert(City),
+            [
+                {"name": f"bench {run} {c}", "province_id": PROVINCE_ID}
+                for c in range(rows)
+            ],
+        )
+        await db.commit()
+
+
+# keyset_page before the read-only rows: ORM instances through db.scalars
+async def orm_page(db, query, keys, limit, cursor):
+    if cursor:
+        values = decode_cursor(cursor)
+        after = [values[key.key] for key in keys]
+        query = query.filter(tuple_(*keys) > tuple_(*after))
+    rows = (await db.scalars(query.order_by(*keys).limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(
+            {key.key: getattr(rows[-1], key.key) for key in keys}
+        )
+    return rows, next_cursor
+
+
+async def orm_projects(db, limit, cursor):
+    rows, next_cursor = await orm_page(
+        db,
+        select(Project).filter(Project.company_id == 1),
+        [Project.id],
+        limit,
+        cursor,
+    )
+    return json_response(Page[ProjectBase], {"items": rows, "next_cursor": next_cursor})
+
+
+async def orm_users(db, limit, cursor):
+    rows, next_cursor = await orm_page(
+        db,
+        select(User).filter(User.is_admin == False, User.company_id == 1),
+        [User.id],
+        limit,
+        cursor,
+    )
+    return json_response(Page[UserBase], {"items": rows, "next_cursor": next_cursor})
+
+
+async def orm_tasks(db, limit, cursor):
+    parents, next_cursor = await orm_page(
+        db,
+        select(Task).filter(Task.company_id == 1, Task.parent_id.is_(None)),
+        [Task.sort_order, Task.id],
+        limit,
+        cursor,
+    )
+    children = defaultdict(list)
+    for task in (
+        await db.scalars(
+            select(Task)
+            .filter(Task.parent_id.in_([task.id for task in parents]))
+            .order_by(Task.sort_order, Task.id)
+        )
+    ).all():
+        children[task.parent_id].append(task)
+    items = []
+    for task in parents:
+        task_data = TaskWithChildren.model_validate(task)
+        task_data.children = [TaskBase.model_validate(c) for c in children[task.id]]
+        items.append(task_data)
+    return json_response(
+        Page[TaskWithChildren], {"items": items, "next_cursor": next_cursor}
+    )
+
+
+async def orm_cities(db, limit, cursor):
+    rows, next_cursor = await orm_page(
+        db,
+        select(City).filter(City.province_id == PROVINCE_ID),
+        [City.name, City.id],
+        limit,
+        cursor,
+    )
+    return json_response(Page[CityBase], {"items": rows, "next_cursor": next_cursor})
+
+
+async def columns_projects(db, limit, cursor):
+    return await get_all_projects(
+        db=db,
+        current_user=ADMIN,
+        limit=limit,
+        cursor=cursor,
+        include_total=False,
+        project_status=None,
+        priority=None,
+        city_id=None,
+        assignee_id=None,
+    )
+
+
+async def columns_users(db, limit, cursor):
+    return await get_users(
+        db=db, current_user=ADMIN, limit=limit, cursor=cursor, include_total=False
+    )
+
+
+# served from the cached task catalog since app.core.task_catalog, one query per catalog
+async def catalog_tasks(db, limit, cursor):
+    return await get_all_tasks(
+        db=db, current_user=ADMIN, limit=limit, cursor=cursor, include_total=False
+    )
+
+
+# served from the in-memory reference data since app.core.geo, db is not used
+async def geo_cities(db, limit, cursor):
+    return await get_cities_by_province(
+        geo=await get_geo_data(),
+        province_id=PROVINCE_ID,
+        limit=limit,
+        cursor=cursor,
+        include_total=False,
+        name="",
+        if_none_match=None,
+    )
+
+
+ENDPOINTS = [
+    ("/projects/all", orm_projects, "columns", columns_projects),
+    ("/users/all", orm_users, "columns", columns_users),
+    ("/tasks/all", orm_tasks, "catalog", catalog_tasks),
+    ("/provinces/{id}/cities", orm_cities, "geo", geo_cities),
+]
+
+
+async def walk(endpoint, limit: int) -> tuple:
+    pages = size = 0
+    cursor = None
+    while True:
+        async with AsyncSessionLocal() as db:
+            response = await endpoint(db, limit, cursor)
+        pages += 1
+        size += len(response.body)
+        cursor = orjson.loads(response.body)["next_cursor"]
+        if not cursor:
+            return pages, size
+
+
+async def measure(endpoint, limit: int, repeat: int) -> tuple:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        pages, size = await walk(endpoint, limit)
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    await walk(endpoint, limit)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pages, size, min(timings), peak
+
+
+async def run(args):
+    async with scratch_db():
+        await seed(args.rows, args.children)
+        for path, orm, label, current in ENDPOINTS:
+            for label, endpoint in (("orm", orm), (label, current)):
+                pages, size, elapsed, peak = await measure(
+                    endpoint, args.limit, args.repeat
+                )
+                print(
+                    f"{path:<24} {label:<8} pages={pages:<5} bytes={size:<10} "
+                    f"{elapsed * 1000 / pages:7.2f} ms/page  peak={peak / 2**10:8.1f} KiB"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--children", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,120 @@
+"""
+Project schedule benchmark.
+
+Builds a random dependency forest of --tasks tasks (each task depends on an
+earlier one, or on nothing) and times the critical-path computation in
+memory. Then bulk-inserts the same tasks as one project and times
+projects.get_project_schedule cold (load, build, compute) and warm (served
+from the per-project cache). Use a scratch database:
+
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/schedule.py --tasks 10000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import orjson
+from sqlalchemy import insert, select
+
+from app.core.schedule import TaskGraph
+from app.database import AsyncSessionLocal
+from app.models.city import City
+from app.models.project import Project
+from app.models.project_task import ProjectTask
+from app.models.task import Task
+from app.routes.project import get_project_schedule
+from _common import scratch_db
+
+
+def random_tasks(size: int) -> list:
+    # (index, dependency index or None, duration), roughly one task in ten starts a chain
+    return [
+        (
+            i,
+            random.randrange(i) if i and random.random() > 0.1 else None,
+            random.randint(1, 10),
+        )
+        for i in range(size)
+    ]
+
+
+async def seed(tasks: list) -> int:
+    run = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        city = await db.scalar(select(City))
+        task_ids = (
+            await db.scalars(
+                insert(Task).returning(Task.id),
+                [{"name": f"task {i}", "sort_order": i} for i, _, _ in tasks],
+            )
+        ).all()
+        project_id = await db.scalar(
+            insert(Project)
+            .values(
+                name=f"bench {run}",
+                address="1 Main St",
+                city_id=city.id,
+                province_id=city.province_id,
+                budget=1000,
+                start_date=datetime(2025, 1, 1),
+            )
+            .returning(Project.id)
+        )
+        await db.execute(
+            insert(ProjectTask),
+            [
+                {
+                    "project_id": project_id,
+                    "task_id": task_ids[i],
+                    "dependency": None if dependency is None else task_ids[dependency],
+                    "duration": duration,
+                    "budget": 0,
+                }
+                for i, dependency, duration in tasks
+            ],
+        )
+        await db.commit()
+    return project_id
+
+
+async def endpoint(label: str, project_id: int):
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        response = await get_project_schedule(
+            id=project_id, db=db, current_user=SimpleNamespace(company_id=1)
+        )
+        elapsed = time.perf_counter() - started
+    schedule = orjson.loads(response.body)
+    print(
+        f"{label:<24} {elapsed * 1000:8.1f} ms  "
+        f"(duration {schedule['duration']} days, "
+        f"critical path {len(schedule['critical_path'])} tasks)"
+    )
+
+
+async def run(args):
+    tasks = random_tasks(args.tasks)
+
+    started = time.perf_counter()
+    graph = TaskGraph(tasks)
+    built = time.perf_counter()
+    graph.schedule()
+    computed = time.perf_counter()
+    print(f"{'build graph:':<24} {(built - started) * 1000:8.1f} ms")
+    print(f"{'compute schedule:':<24} {(computed - built) * 1000:8.1f} ms")
+
+    async with scratch_db():
+        project_id = await seed(tasks)
+        await endpoint("endpoint, cold:", project_id)
+        await endpoint("endpoint, cached:", project_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=10000)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,114 @@
+"""
+Project list serialization benchmark.
+
+Builds --projects in-memory Project rows (no database) and serves them as a
+JSON list from two small FastAPI apps through TestClient:
+
+- old: model_validate per row, ProjectBase's previous dict-copy
+  model_serializer, FastAPI validating and serializing the response_model,
+  and the stdlib JSONResponse
+- new: serialization.json_response, one precompiled TypeAdapter call to
+  validate the list and one to write it
+
+Prints the median and fastest time per response over --repeat requests:
+
+    python benchmarks/serialization.py --projects 10000
+"""
+
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+import orjson
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import model_serializer
+
+from app.core.serialization import json_response
+from app.models.project import Project, ProjectPriority, ProjectStatus
+from app.schemas.project import ProjectBase
+
+
+class LegacyProjectBase(ProjectBase):
+    # ProjectBase's serializer before the field_serializer
+    @model_serializer(mode="plain")
+    def serialize(self):
+        data = self.__dict__.copy()
+        if abs(data["budget"]) >= 1000:
+            data["budget"] = f"{data['budget']:,.2f}"
+        else:
+            data["budget"] = f"{data['budget']:.2f}"
+        return data
+
+
+def make_projects(count: int) -> list:
+    started = datetime(2025, 1, 1)
+    return [
+        Project(
+            id=p,
+            company_id=1,
+            name=f"project {p}",
+            current_assignee=None,
+            priority=ProjectPriority.LOW,
+            address="1 Main St",
+            postal_code=None,
+            city_id=1,
+            province_id=2,
+            budget=500.0 + p,
+            status=ProjectStatus.PENDING,
+            start_date=started + timedelta(days=p % 365),
+            estimated_duration=30,
+            end_date=started + timedelta(days=p % 365 + 30),
+            actual_end_date=None,
+            actual_budget=0.0,
+        )
+        for p in range(count)
+    ]
+
+
+def build_apps(projects: list) -> dict:
+    old = FastAPI()
+
+    @old.post("/projects", response_model=List[LegacyProjectBase])
+    def old_projects():
+        return [LegacyProjectBase.model_validate(project) for project in projects]
+
+    new = FastAPI()
+
+    @new.post("/projects", response_model=List[ProjectBase])
+    def new_projects():
+        return json_response(List[ProjectBase], projects)
+
+    return {"old:": old, "new:": new}
+
+
+def run(args):
+    projects = make_projects(args.projects)
+    clients = {label: TestClient(app) for label, app in build_apps(projects).items()}
+    timings = {label: [] for label in clients}
+    bodies = {}
+    # warm up, then alternate the apps so drift in the machine hits both alike
+    for client in clients.values():
+        client.post("/projects")
+    for _ in range(args.repeat):
+        for label, client in clients.items():
+            started = time.perf_counter()
+            response = client.post("/projects")
+            timings[label].append(time.perf_counter() - started)
+            bodies[label] = response.content
+    for label, times in timings.items():
+        print(
+            f"{label:<6} bytes={len(bodies[label]):<10} "
+            f"median {statistics.median(times) * 1000:8.1f} ms/response  "
+            f"min {min(times) * 1000:8.1f} ms"
+        )
+    print("same body:", orjson.loads(bodies["old:"]) == orjson.loads(bodies["new:"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    run(parser.parse_args())
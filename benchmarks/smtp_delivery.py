@@ -0,0 +1,103 @@
+"""
+SMTP delivery benchmark (needs aiosmtpd, and fastapi-mail for the old path).
+
+Starts a local aiosmtpd sink and sends the same notification email N times,
+first the old way (a new FastMail client and SMTP session per message, template
+looked up on every call) and then through app.core.email.send_email, which
+reuses pooled connections and precompiled templates. Prints messages/sec for
+both. Run from the repo root with the usual .env:
+
+    python benchmarks/smtp_delivery.py --messages 500
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from aiosmtpd.controller import Controller
+
+HOST = "127.0.0.1"
+PORT = 8025
+
+# point the app at the local sink before app.core.settings is imported
+os.environ.update(
+    MAIL_SERVER=HOST,
+    MAIL_PORT=str(PORT),
+    MAIL_USERNAME="",
+    MAIL_PASSWORD="",
+    MAIL_STARTTLS="false",
+    MAIL_SSL_TLS="false",
+)
+
+from fastapi_mail import ConnectionConfig, FastMail, MessageSchema  # noqa: E402
+from app.core import email  # noqa: E402
+from app.core.settings import settings  # noqa: E402
+
+DATA = {"title": "Task updated", "content": "Framing is now in progress."}
+
+
+class Sink:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+async def send_per_message(email_to: str):
+    # the delivery path before the pool: new client and session for every message
+    conf = ConnectionConfig(
+        MAIL_USERNAME="",
+        MAIL_PASSWORD="",
+        MAIL_FROM=settings.MAIL_FROM,
+        MAIL_PORT=PORT,
+        MAIL_SERVER=HOST,
+        MAIL_FROM_NAME=settings.MAIL_FROM_NAME,
+        MAIL_STARTTLS=False,
+        MAIL_SSL_TLS=False,
+        USE_CREDENTIALS=False,
+    )
+    html = email.env.get_template("notification.html").render(**DATA)
+    message = MessageSchema(
+        subject=DATA["title"], recipients=[email_to], body=html, subtype="html"
+    )
+    await FastMail(conf).send_message(message)
+
+
+async def send_pooled(email_to: str):
+    await email.send_email(email_to, DATA["title"], "notification", DATA)
+
+
+async def measure(label: str, send, messages: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await send(f"user{i}@example.com")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(messages)))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22} {messages / elapsed:8.1f} msg/s")
+
+
+async def run(args):
+    sink = Sink()
+    controller = Controller(sink, hostname=HOST, port=PORT)
+    controller.start()
+    try:
+        email.load_templates()
+        await measure("session per message:", send_per_message, args.messages, 8)
+        await measure("pooled sessions:", send_pooled, args.messages, 8)
+        await email.smtp_pool.close()
+    finally:
+        controller.stop()
+    print(f"received: {sink.received}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=500)
+    asyncio.run(run(parser.parse_args()))
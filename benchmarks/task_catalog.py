@@ -0,0 +1,99 @@
+"""
+Task catalog cache benchmark.
+
+Bulk-inserts --categories top-level tasks with --subtasks subtasks each for
+the default company, then calls the three catalog routes (/tasks/all,
+/tasks/categories, /tasks/{id}/subtasks) --calls times each, once clearing
+the catalog cache before every call (one query and a tree rebuild, as every
+call did before the cache) and once with the cache warm. Prints the time per
+call and the cache stats. Use a scratch database:
+
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/task_catalog.py --categories 50
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+
+from sqlalchemy import insert
+
+from app.core.task_catalog import bump_catalog_version, catalog_cache
+from app.database import AsyncSessionLocal
+from app.models.task import Task
+from app.routes.task import get_all_tasks, get_categories, get_subtasks_by_category
+from _common import scratch_db
+
+ADMIN = SimpleNamespace(id=1, company_id=1)
+
+
+async def seed(categories: int, subtasks: int) -> int:
+    run = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        parent_ids = (
+            await db.scalars(
+                insert(Task).returning(Task.id),
+                [
+                    {"company_id": 1, "name": f"{run} category {i}", "sort_order": i}
+                    for i in range(categories)
+                ],
+            )
+        ).all()
+        await db.execute(
+            insert(Task),
+            [
+                {
+                    "company_id": 1,
+                    "parent_id": parent_id,
+                    "name": f"{run} subtask {i}",
+                    "sort_order": i,
+                }
+                for parent_id in parent_ids
+                for i in range(subtasks)
+            ],
+        )
+        await db.commit()
+    # bulk inserts skip the catalog events
+    bump_catalog_version(1)
+    return parent_ids[0]
+
+
+async def measure(label: str, call, calls: int, cached: bool):
+    started = time.perf_counter()
+    for _ in range(calls):
+        if not cached:
+            catalog_cache.clear()
+        # a fresh session per call, like a request
+        async with AsyncSessionLocal() as db:
+            await call(db)
+    elapsed = time.perf_counter() - started
+    state = "cached" if cached else "uncached"
+    print(f"{label:<22} {state:<9} {elapsed / calls * 1000:8.3f} ms/call")
+
+
+async def run(args):
+    async with scratch_db():
+        category_id = await seed(args.categories, args.subtasks)
+
+        routes = {
+            "/tasks/all": lambda db: get_all_tasks(
+                db=db, current_user=ADMIN, limit=20, cursor=None, include_total=True
+            ),
+            "/tasks/categories": lambda db: get_categories(db=db, current_user=ADMIN),
+            "/tasks/{id}/subtasks": lambda db: get_subtasks_by_category(
+                id=category_id, db=db, current_user=ADMIN
+            ),
+        }
+        for label, call in routes.items():
+            await measure(label, call, args.calls, cached=False)
+            await measure(label, call, args.calls, cached=True)
+        print(catalog_cache.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--subtasks", type=int, default=10)
+    parser.add_argument("--calls", type=int, default=200)
+    asyncio.run(run(parser.parse_args()))
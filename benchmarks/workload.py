@@ -0,0 +1,115 @@
+"""
+Contractor workload benchmark.
+
+Bulk-inserts --contractors contractors and --assignments project tasks
+spread over them, each lasting 1-15 days within a 90 day window, then times
+analytics.get_contractor_workload over that window by day and by week. Use a
+scratch database:
+
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/workload.py --contractors 2000 --assignments 30000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import insert, select
+
+from app.database import AsyncSessionLocal
+from app.models.city import City
+from app.models.project import Project
+from app.models.project_task import ProjectTask
+from app.models.task import Task
+from app.models.user import User
+from app.routes.analytics import get_contractor_workload
+from _common import scratch_db
+
+TASKS_PER_PROJECT = 30
+WINDOW_START = datetime(2025, 1, 1)
+
+
+async def seed(contractors: int, assignments: int):
+    run = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        city = await db.scalar(select(City))
+        user_ids = (
+            await db.scalars(
+                insert(User).returning(User.id),
+                [
+                    {"email": f"contractor{i}-{run}@example.com", "password": "x"}
+                    for i in range(contractors)
+                ],
+            )
+        ).all()
+        task_ids = (
+            await db.scalars(
+                insert(Task).returning(Task.id),
+                [{"name": f"task {i}"} for i in range(TASKS_PER_PROJECT)],
+            )
+        ).all()
+        project_ids = (
+            await db.scalars(
+                insert(Project).returning(Project.id),
+                [
+                    {
+                        "name": f"bench {run} {p}",
+                        "address": "1 Main St",
+                        "city_id": city.id,
+                        "province_id": city.province_id,
+                        "budget": 1000,
+                    }
+                    for p in range(-(-assignments // TASKS_PER_PROJECT))
+                ],
+            )
+        ).all()
+        rows = []
+        for n in range(assignments):
+            start = WINDOW_START + timedelta(days=random.randrange(90))
+            rows.append(
+                {
+                    "project_id": project_ids[n // TASKS_PER_PROJECT],
+                    "task_id": task_ids[n % TASKS_PER_PROJECT],
+                    "assignee_id": random.choice(user_ids),
+                    "start_date": start,
+                    "end_date": start + timedelta(days=random.randint(1, 15)),
+                    "budget": 0,
+                }
+            )
+        await db.execute(insert(ProjectTask), rows)
+        await db.commit()
+
+
+async def measure(granularity: str):
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        result = await get_contractor_workload(
+            db=db,
+            current_user=SimpleNamespace(company_id=1),
+            start_date=WINDOW_START.strftime("%Y-%m-%d"),
+            end_date=(WINDOW_START + timedelta(days=90)).strftime("%Y-%m-%d"),
+            granularity=granularity,
+        )
+        elapsed = time.perf_counter() - started
+    conflicts = sum(len(contractor["conflicts"]) for contractor in result)
+    print(
+        f"by {granularity:<5} contractors={len(result):<6} conflicts={conflicts:<7} "
+        f"{elapsed * 1000:8.1f} ms"
+    )
+
+
+async def run(args):
+    async with scratch_db():
+        await seed(args.contractors, args.assignments)
+        await measure("day")
+        await measure("week")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--contractors", type=int, default=2000)
+    parser.add_argument("--assignments", type=int, default=30000)
+    asyncio.run(run(parser.parse_args()))